@@ -0,0 +1,130 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from cache_store import SQLiteCache, CACHE_DIR
+
+ARTICLE_COLLECTION = "articles"
+ARTICLE_KNOWN_MAX = int(os.getenv("ARTICLE_KNOWN_MAX", "200000"))
+ARTICLE_KNOWN_TTL = float(os.getenv("ARTICLE_KNOWN_TTL", str(30 * 24 * 3600)))
+ARTICLE_RESOLVE_CACHE = int(os.getenv("ARTICLE_RESOLVE_CACHE", "5000"))
+
+# Query parameters that identify the click, not the article
+TRACKING_PREFIXES = ("utm_", "mc_", "pk_", "ga_")
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "igshid", "ocid", "cmpid", "ref", "ref_src", "smid", "taid", "ito", "cid"}
+
+# Fields kept in the article document; anything else is per-report
+ARTICLE_FIELDS = ("title", "url", "domain", "sourcecountry", "seendate", "tone", "language", "image")
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizes an article URL so the same story behind different links gets one key:
+    scheme and "www." are dropped, the host is lowercased, fragments, trailing slashes and
+    tracking parameters are removed and the remaining query parameters are sorted.
+    """
+    parts = urlsplit((url or "").strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def article_id(url: str) -> str:
+    return hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()[:32]
+
+
+class ArticleStore:
+    """
+    Content-addressed article storage.
+    Articles are written once to their own collection, keyed by the hash of the canonical URL;
+    reports keep only the ordered list of article IDs (`article_refs`, rank = position).
+    Writes go through the report writer's spool, so an article is queued in the same
+    transaction as the first report that references it. IDs are remembered in a local SQLite
+    index once the writer confirms them (`mark_written` is its `on_written` callback), so
+    shared wire stories are not rewritten for every report, while an article that was never
+    stored (e.g. dead-lettered) is queued again by the next report that references it.
+    `resolve` hydrates references with one batched read per call and an in-memory LRU.
+    """
+
+    def __init__(self, writer, backend, known_path: str = os.path.join(CACHE_DIR, "articles_known.sqlite3"),
+                 resolve_cache_size: int = ARTICLE_RESOLVE_CACHE):
+        self.writer = writer
+        self.backend = backend
+        self.known = SQLiteCache(known_path, ttl=ARTICLE_KNOWN_TTL, max_entries=ARTICLE_KNOWN_MAX)
+        self.resolve_cache_size = resolve_cache_size
+        self.written = 0
+        self.reused = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prepare(self, articles: list) -> tuple:
+        """
+        Splits a report's articles into (refs, items): the ordered, de-duplicated article IDs
+        for the report and the spool items for articles not stored yet.
+        """
+        refs = []
+        items = []
+        for art in articles:
+            doc_id = article_id(art.get("url", ""))
+            if doc_id in refs:
+                continue
+            refs.append(doc_id)
+            if self.known.get(doc_id):
+                self.reused += 1
+                continue
+            items.append((ARTICLE_COLLECTION, doc_id, {k: art.get(k) for k in ARTICLE_FIELDS}))
+        return refs, items
+
+    def mark_written(self, items: list):
+        """
+        Records the articles among written (collection, doc_id, data) items as stored.
+        """
+        articles = [(doc_id, data) for collection, doc_id, data in items if collection == ARTICLE_COLLECTION]
+        for doc_id, data in articles:
+            self.known.set(doc_id, True)
+            self._remember(doc_id, data)
+        self.written += len(articles)
+
+    def resolve(self, refs: list) -> list:
+        """
+        Returns the article dicts for `refs` in order; unknown IDs are skipped.
+        """
+        found = {}
+        with self._lock:
+            for doc_id in refs:
+                if doc_id in self._cache:
+                    self._cache.move_to_end(doc_id)
+                    found[doc_id] = self._cache[doc_id]
+        missing = [doc_id for doc_id in dict.fromkeys(refs) if doc_id not in found]
+        if missing:
+            fetched = self.writer.spooled(ARTICLE_COLLECTION, missing)
+            remaining = [doc_id for doc_id in missing if doc_id not in fetched]
+            if remaining and self.backend.available():
+                fetched.update(self.backend.get_many(ARTICLE_COLLECTION, remaining))
+            for doc_id, data in fetched.items():
+                data.pop("timestamp", None)
+                self._remember(doc_id, data)
+            found.update(fetched)
+        return [found[doc_id] for doc_id in refs if doc_id in found]
+
+    def _remember(self, doc_id: str, data: dict):
+        with self._lock:
+            self._cache[doc_id] = data
+            self._cache.move_to_end(doc_id)
+            while len(self._cache) > self.resolve_cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "written": self.written,
+            "reused": self.reused,
+            "known": self.known.stats()["entries"],
+            "resolve_cache": len(self._cache)
+        }
@@ -0,0 +1,308 @@
+import os
+import re
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from clients import registry
+from pipeline import StageGraph
+from dedup import dedup_articles
+from context import build_context, truncate_tokens
+from source_index import get_source_index
+from fact_checker import (
+    RETRIEVAL_WORKERS, GDELT_WIDE_MAX_RECORDS, PERSPECTIVE_LABELS, UNKNOWN_BIAS, PLAN_BIAS_SCHEMA, PLAN_FIELDS,
+    invoke_llm, plan_queries_schema, parse_plan, validate_plan, validate_bias, distinct_queries, json_fields,
+    gdelt_search, use_wide_retrieval, build_report_prompt
+)
+
+BATCH_MAX_CLAIMS = int(os.getenv("BATCH_MAX_CLAIMS", "8"))
+BATCH_SYNTHESIS_WORKERS = int(os.getenv("BATCH_SYNTHESIS_WORKERS", "3"))
+# Transcript tokens sent to the claim extraction and planning prompts
+BATCH_INPUT_TOKENS = int(os.getenv("BATCH_INPUT_TOKENS", "3000"))
+# Perspective queries are sent only if the GDELT rate limit can start all of them within this many seconds
+BATCH_RETRIEVAL_S = float(os.getenv("BATCH_RETRIEVAL_S", "30"))
+
+VERDICTS = ("TRUE", "FALSE", "MISLEADING", "COMPLEX", "UNVERIFIED")
+
+_QUERIES_KEY = re.compile(r'"queries"\s*:')
+_VERDICT = re.compile(r"\*\*Conclusion:?\*\*:?\s*\**\s*\[?\**(" + "|".join(VERDICTS) + r")", re.IGNORECASE)
+
+
+def extract_claims(text: str, llm) -> list:
+    """
+    Splits a transcript into self-contained, checkable factual claims with a single LLM call.
+    Returns at most BATCH_MAX_CLAIMS claims; falls back to the whole text as one claim.
+    """
+    prompt = f"""Extract the distinct factual claims that can be fact-checked from the following text:
+"{truncate_tokens(text, BATCH_INPUT_TOKENS)}"
+
+Rules:
+- Each claim must be a single, self-contained statement (resolve pronouns like "he" or "it").
+- Skip opinions, questions, greetings and filler.
+- Merge claims that state the same fact.
+- Return at most {BATCH_MAX_CLAIMS} claims, most important first.
+
+Return ONLY the claims, one per line, numbered like:
+1. [claim]
+2. [claim]"""
+
+    try:
+        response = invoke_llm(llm, prompt, "claims")
+        claims = []
+        for line in response.content.strip().split('\n'):
+            claim = re.sub(r"^\s*(?:\d+[.)]|[-*•])\s*", "", line).strip()
+            if claim and claim.lower() not in [c.lower() for c in claims]:
+                claims.append(claim)
+        return claims[:BATCH_MAX_CLAIMS] or [text]
+    except Exception as e:
+        print(f"Claim extraction error: {e}")
+        return [text]
+
+
+def build_batch_plan_prompt(text: str, claims: list, labels: tuple) -> str:
+    numbered = "\n".join(f"{i + 1}. {claim}" for i, claim in enumerate(claims))
+    return f"""Plan a fact check of the claims made in the following text:
+"{truncate_tokens(text, BATCH_INPUT_TOKENS)}"
+
+Claims:
+{numbered}
+
+Return ONLY a JSON object with one plan per claim, in claim order:
+{{"bias": {PLAN_BIAS_SCHEMA}, "plans": [{{"queries": {plan_queries_schema(labels)}}}, ...]}}
+
+{PLAN_FIELDS}
+Claims about the same event should reuse the same query wording."""
+
+
+def parse_batch_plan(content: str, claims: list, labels: tuple = tuple(PERSPECTIVE_LABELS)) -> dict:
+    """
+    Parses the batch planning reply. Each claim's plan is checked with validate_plan; if the
+    JSON is malformed or truncated, each claim's "queries" object is recovered by the
+    fallback parser of parse_plan instead. Claims without a usable plan are searched by
+    their own text as the only (GENERAL) query.
+    Returns {"input_bias": "LABEL: explanation", "queries": [{label: query} per claim]}.
+    """
+    content = (content or "").strip()
+    bias, plans = None, None
+    start, end = content.find("{"), content.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(content[start:end + 1])
+            if not isinstance(data, dict) or not isinstance(data.get("plans"), list):
+                raise ValueError("plan has no plans list")
+            bias, plans = data.get("bias"), data["plans"]
+        except ValueError as e:
+            print(f"Batch plan JSON rejected ({e}), using fallback parser")
+    if plans is None:
+        # The bias fields come before the first "queries" key; each claim's queries follow one
+        head, *plans = _QUERIES_KEY.split(content)
+        fields = json_fields(head)
+        bias = {"label": fields.get("LABEL"), "explanation": fields.get("EXPLANATION")}
+
+    queries = []
+    for idx, claim in enumerate(claims):
+        plan = plans[idx] if idx < len(plans) else None
+        try:
+            if isinstance(plan, str):
+                planned = parse_plan(plan, labels)
+            else:
+                planned = validate_plan({"queries": plan.get("queries") if isinstance(plan, dict) else None}, labels)
+            queries.append(distinct_queries(planned["queries"], labels))
+        except ValueError as e:
+            print(f"No usable plan for claim {idx + 1} ({e}); searching the claim text")
+            queries.append({"GENERAL": claim})
+    return {"input_bias": validate_bias(bias), "queries": queries}
+
+
+def plan_batch(text: str, claims: list, llm) -> dict:
+    """
+    Classifies the political lean of the text and writes the perspective queries of every
+    claim in one LLM call that returns JSON (see build_batch_plan_prompt).
+    Returns {"input_bias": ..., "queries": [{label: query} per claim]}; an unusable reply
+    leaves the bias unknown and searches each claim by its own text.
+    """
+    labels = tuple(PERSPECTIVE_LABELS)
+    try:
+        response = invoke_llm(llm, build_batch_plan_prompt(text, claims, labels), "batch_plan", json_mode=True)
+        return parse_batch_plan(response.content, claims, labels)
+    except Exception as e:
+        print(f"Batch planning error: {e}")
+        return {"input_bias": UNKNOWN_BIAS, "queries": [{"GENERAL": claim} for claim in claims]}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def retrieve_batch(query_plans: list, wide: bool = False) -> dict:
+    """
+    Runs the GDELT queries of all claims ({perspective: query} each) with bounded
+    concurrency, sending each distinct query once. With `wide` only each claim's general query is sent, and its articles are
+    assigned to perspectives by the source index. Queries wait for their rate limiter slot
+    however long it takes, so none is dropped. Returns {"perspectives": [per-claim perspective data], "queries": {...}, "latency_ms": ...}.
+    """
+    query_plans = [{"GENERAL": queries["GENERAL"]} if wide else queries for queries in query_plans]
+    unique = {}
+    for queries in query_plans:
+        for query in queries.values():
+            unique.setdefault(normalize_query(query), query)
+
+    def timed_search(query):
+        start = time.perf_counter()
+        try:
+            result = gdelt_search(query, max_records=GDELT_WIDE_MAX_RECORDS) if wide else gdelt_search(query)
+        except Exception as e:
+            result = {"articles": [], "error": str(e)}
+        return result.get("articles") or [], (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=max(1, min(RETRIEVAL_WORKERS, len(unique)))) as pool:
+        results = dict(zip(unique, pool.map(timed_search, unique.values())))
+
+    perspectives = []
+    for queries in query_plans:
+        if wide:
+            perspectives.append(get_source_index().assign(results[normalize_query(queries["GENERAL"])][0]))
+            continue
+        perspectives.append({
+            perspective: results[normalize_query(query)][0]
+            for perspective, query in queries.items()
+        })
+    planned = sum(len(queries) for queries in query_plans)
+    print(f"  Retrieved {len(unique)} distinct queries for {planned} planned")
+    return {
+        "perspectives": perspectives,
+        "mode": "wide" if wide else "perspectives",
+        "queries": {"planned": planned, "distinct": len(unique)},
+        "latency_ms": round(max((r[1] for r in results.values()), default=0.0), 1)
+    }
+
+
+def parse_verdict(report: str) -> str:
+    match = _VERDICT.search(report or "")
+    return match.group(1).upper() if match else "UNVERIFIED"
+
+
+def check_claim(claim: str, input_bias: str, perspective_data: dict, llm) -> dict:
+    """
+    Synthesizes the report for one claim from its retrieved articles.
+    Returns the same fields as run_fact_check, plus the parsed verdict.
+    """
+    perspectives, unique_articles = dedup_articles(perspective_data)
+    if not unique_articles:
+        return {"claim": claim, "error": "No data retrieved from any source", "verdict": "UNVERIFIED", "articles": []}
+
+    context = build_context(claim, input_bias, perspectives)
+    report = invoke_llm(llm, build_report_prompt(context["topic"], context["input_bias"], context["context"]), "synthesis").content
+    return {
+        "claim": claim,
+        "verdict": parse_verdict(report),
+        "report": report,
+        "articles": unique_articles[:30],
+        "article_count": len(unique_articles),
+        "input_bias": input_bias,
+        "perspectives": {
+            "left": len(perspectives.get("LEFT", [])),
+            "right": len(perspectives.get("RIGHT", [])),
+            "center": len(perspectives.get("CENTER", [])),
+            "international": len(perspectives.get("INTERNATIONAL", []))
+        }
+    }
+
+
+def run_batch_fact_check(text: str, lookup=None, on_event=None):
+    """
+    Batch pipeline for long, multi-claim inputs, run as a stage graph:
+    1. CLAIMS: Split the text into atomic claims (one LLM call)
+    2-3. PLAN: Classify the input's political lean and generate the perspective queries for
+       all unchecked claims, in one structured LLM call (the same JSON schema and fallback
+       parser as run_fact_check's plan)
+    4. RETRIEVE: Run the distinct GDELT queries of all claims concurrently (one wide query per
+       claim when the GDELT rate limit cannot send every perspective query within BATCH_RETRIEVAL_S)
+    5. SYNTHESIZE: One report per claim, BATCH_SYNTHESIS_WORKERS at a time
+    `lookup(claim)` may return an earlier result for a claim (e.g. from the report cache);
+    those claims skip planning, retrieval and synthesis.
+    If `on_event(event, data)` is given, it is called as each stage finishes.
+    """
+    llm = registry.llm()
+    if llm is None:
+        return json.dumps({"error": "GROQ_API_KEY not found", "claims": []})
+
+    def emit(event, data):
+        if on_event:
+            on_event(event, data)
+
+    def claims():
+        extracted = extract_claims(text, llm)
+        print(f"Extracted {len(extracted)} claims")
+        emit("claims", {"claims": extracted})
+        known = {}
+        if lookup:
+            for claim in extracted:
+                cached = lookup(claim)
+                if cached:
+                    known[claim] = dict(cached, claim=claim, cached=True)
+        return {"all": extracted, "known": known, "pending": [c for c in extracted if c not in known]}
+
+    def plan(claims):
+        # Runs even when every claim is cached, for the bias of the text
+        planned = plan_batch(text, claims["pending"], llm)
+        emit("queries", {"claims": len(planned["queries"])})
+        return planned
+
+    def retrieve(plan):
+        query_plans = plan["queries"]
+        distinct = {normalize_query(query) for queries in query_plans for query in queries.values()}
+        wide = use_wide_retrieval(len(distinct), BATCH_RETRIEVAL_S)
+        return retrieve_batch(query_plans, wide) if query_plans else {"perspectives": [], "mode": None, "queries": {"planned": 0, "distinct": 0}, "latency_ms": 0.0}
+
+    def synthesize(claims, plan, retrieval):
+        pending = list(zip(claims["pending"], retrieval["perspectives"]))
+        if not pending:
+            return []
+
+        def check(item):
+            claim, perspective_data = item
+            try:
+                result = check_claim(claim, plan["input_bias"], perspective_data, llm)
+            except Exception as e:
+                result = {"claim": claim, "error": f"Synthesis error: {e}", "verdict": "UNVERIFIED", "articles": []}
+            emit("claim_checked", {"claim": claim, "verdict": result["verdict"]})
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, min(BATCH_SYNTHESIS_WORKERS, len(pending)))) as pool:
+            return list(pool.map(check, pending))
+
+    graph = StageGraph(name="batch")
+    graph.add("claims", claims)
+    graph.add("plan", plan, deps=["claims"])
+    graph.add("retrieval", retrieve, deps=["plan"])
+    graph.add("synthesis", synthesize, deps=["claims", "plan", "retrieval"])
+
+    try:
+        results = graph.run()
+    except Exception as e:
+        return json.dumps({"error": f"Batch error: {e}", "claims": []})
+
+    checked = dict(zip(results["claims"]["pending"], results["synthesis"]))
+    checked.update(results["claims"]["known"])
+    pending = results["claims"]["pending"]
+    return json.dumps({
+        "claims": [checked[claim] for claim in results["claims"]["all"]],
+        "claim_count": len(results["claims"]["all"]),
+        "input_bias": results["plan"]["input_bias"],
+        "upstream_calls": {
+            # claims + one shared planning call (bias and queries) + one synthesis per unchecked claim
+            "llm": 2 + len(pending),
+            "gdelt": results["retrieval"]["queries"]
+        },
+        "retrieval": {"mode": results["retrieval"]["mode"]},
+        "timings": {"stages": graph.timings}
+    })
+
+
+if __name__ == "__main__":
+    import sys
+
+    result = json.loads(run_batch_fact_check(sys.argv[1] if len(sys.argv) > 1 else "US troops landed in Greenland. Denmark objected."))
+    for item in result.get("claims", []):
+        print(f"[{item.get('verdict')}] {item['claim']}")
+    print(json.dumps(result.get("upstream_calls", result.get("error")), indent=2))
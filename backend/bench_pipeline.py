@@ -0,0 +1,395 @@
+"""
+Pipeline benchmark for the fact-check backend.
+Starts local stand-in servers that replay recorded GDELT and Groq responses (bench_fixtures/)
+with configurable injected latency and errors, points the backend at them, then drives
+concurrent load through run_fact_check and the Flask endpoints (/factcheck + /jobs polling,
+/factcheck/stream). Prints a JSON summary with per-stage and end-to-end p50/p95/p99 latency
+and throughput; use it to track pipeline regressions without touching live services.
+
+Usage: python bench_pipeline.py [--requests N] [--concurrency C] [--scenarios pipeline,factcheck,stream]
+                                [--gdelt-latency-ms MS] [--groq-latency-ms MS] [--jitter FRACTION]
+                                [--gdelt-error-rate P] [--groq-error-rate P] [--output FILE]
+       python bench_pipeline.py record "search terms"   # refresh the GDELT fixture from the live API
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+GDELT_FIXTURE = os.path.join(FIXTURES_DIR, "gdelt_artlist.json")
+GROQ_FIXTURE = os.path.join(FIXTURES_DIR, "groq_replies.json")
+
+TOPICS = [
+    "Germany will send troops to Greenland to boost Arctic defence",
+    "Denmark and Greenland held inconclusive talks with US officials in Washington",
+    "Trump says Greenland is essential for US national security",
+    "European countries announce joint Greenland defence measures",
+]
+
+# GDELT answers an over-eager client with HTTP 200 and a plain-text notice instead of JSON
+GDELT_THROTTLE_TEXT = "Please limit requests to one every 5 seconds or contact kalev.leetaru5@gmail.com for larger queries."
+
+
+class StandIn:
+    """
+    Latency and error injection shared by a stand-in server's request handlers.
+    """
+
+    def __init__(self, latency_ms: float, jitter: float, error_rate: float, seed: int = 7):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        with self._lock:
+            factor = 1 + self._rng.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, self.latency_ms * factor) / 1000)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return fail
+
+    def choice(self, options):
+        with self._lock:
+            return self._rng.choice(options)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "injected_errors": self.errors}
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def gdelt_handler(standin: StandIn, fixture: dict):
+    body = json.dumps(fixture).encode("utf-8")
+
+    class GDELTHandler(QuietHandler):
+        def do_GET(self):
+            standin.delay()
+            if standin.should_fail():
+                if standin.choice(["status", "throttle"]) == "status":
+                    self.send_body(503, b"Service Unavailable", "text/plain")
+                else:
+                    self.send_body(200, GDELT_THROTTLE_TEXT.encode("utf-8"), "text/plain")
+                return
+            self.send_body(200, body)
+
+    return GDELTHandler
+
+
+def groq_reply(replies: dict, prompt: str) -> str:
+    if "Plan a fact check" in prompt:
+        return replies["plan"]
+    if "Analyze the political bias" in prompt:
+        return replies["bias"]
+    if "Extract the distinct factual claims" in prompt:
+        return replies["claims"]
+    if "Generate GDELT search queries" in prompt:
+        return replies["queries"]
+    return replies["report"]
+
+
+def groq_handler(standin: StandIn, replies: dict, token_ms: float):
+    """
+    Minimal OpenAI-compatible chat completions endpoint, as served by Groq, with streaming.
+    """
+
+    class GroqHandler(QuietHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            standin.delay()
+            if standin.should_fail():
+                self.send_body(500, json.dumps({"error": {"message": "injected error", "type": "internal_server_error"}}).encode("utf-8"))
+                return
+
+            prompt = "".join(str(m.get("content", "")) for m in payload.get("messages", []))
+            content = groq_reply(replies, prompt)
+            usage = {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4
+            }
+            base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": payload.get("model", "bench")}
+
+            if not payload.get("stream"):
+                self.send_body(200, json.dumps(dict(
+                    base, object="chat.completion", usage=usage,
+                    choices=[{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]
+                )).encode("utf-8"))
+                return
+
+            words = content.split(" ")
+            chunks = [dict(base, object="chat.completion.chunk",
+                           choices=[{"index": 0, "delta": {"content": w if i == 0 else " " + w}, "finish_reason": None}])
+                      for i, w in enumerate(words)]
+            chunks.append(dict(base, object="chat.completion.chunk", x_groq={"usage": usage},
+                               choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+            events = [f"data: {json.dumps(chunk)}\n\n".encode("utf-8") for chunk in chunks] + [b"data: [DONE]\n\n"]
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Content-Length", str(sum(len(e) for e in events)))
+            self.end_headers()
+            for event in events:
+                self.wfile.write(event)
+                self.wfile.flush()
+                if token_ms:
+                    time.sleep(token_ms / 1000)
+
+    return GroqHandler
+
+
+def start_server(handler) -> tuple:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def configure_environment(gdelt_url: str, groq_url: str, cache_dir: str):
+    """
+    Points the backend at the stand-ins. Must run before any backend module is imported,
+    since they read their settings at import time.
+    """
+    os.environ.update({
+        "GDELT_API_URL": f"{gdelt_url}/api/v2/doc/doc",
+        "GROQ_BASE_URL": groq_url,
+        "GROQ_API_KEY": "bench",
+        "GDELT_CACHE_ENABLED": "0",
+        "CACHE_DIR": cache_dir,
+        "PERSISTENCE_BACKEND": "local",
+        "FIREBASE_CREDENTIALS": os.path.join(cache_dir, "no-credentials.json"),
+        # Client-side request limits would cap the measured throughput; throttled responses still back off
+        "GDELT_RATE": "0",
+        "GROQ_RPM": "0",
+    })
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(values: list) -> dict:
+    if not values:
+        return {}
+    return {
+        "p50": round(percentile(values, 50), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+        "mean": round(statistics.fmean(values), 1),
+        "max": round(max(values), 1)
+    }
+
+
+def run_load(func, count: int, concurrency: int) -> dict:
+    """
+    Calls `func(i)` `count` times from `concurrency` threads (closed loop).
+    `func` returns a dict of extra millisecond measurements or raises on failure.
+    """
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            extra = func(i) or {}
+            ok = True
+        except Exception as e:
+            extra = {"error": str(e)}
+            ok = False
+        return ok, (time.perf_counter() - start) * 1000, extra
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(timed, range(count)))
+    elapsed = time.perf_counter() - start
+
+    succeeded = [s for s in samples if s[0]]
+    summary = {
+        "requests": count,
+        "errors": count - len(succeeded),
+        "throughput_rps": round(len(succeeded) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize([s[1] for s in succeeded])
+    }
+    extra_keys = sorted({key for s in succeeded for key, value in s[2].items() if isinstance(value, (int, float))})
+    for key in extra_keys:
+        summary[f"{key}_ms"] = summarize([s[2][key] for s in succeeded if key in s[2]])
+    stage_keys = sorted({key for s in succeeded for key in s[2].get("stages", {})})
+    if stage_keys:
+        summary["stages_ms"] = {key: summarize([s[2]["stages"][key] for s in succeeded if key in s[2].get("stages", {})])
+                                for key in stage_keys}
+    errors = [s[2]["error"] for s in samples if not s[0]]
+    if errors:
+        summary["sample_errors"] = sorted(set(errors))[:5]
+    return summary
+
+
+def topic(i: int) -> str:
+    # Distinct text per request so the report cache and job coalescing do not short-circuit
+    return f"{TOPICS[i % len(TOPICS)]} (bench request {i})"
+
+
+def pipeline_call(i: int) -> dict:
+    from fact_checker import run_fact_check
+    result = json.loads(run_fact_check(topic(i)))
+    if "report" not in result:
+        raise RuntimeError(result.get("error", "no report"))
+    return {"stages": {name: t["duration_ms"] for name, t in result["timings"]["stages"].items()}}
+
+
+def factcheck_call(base_url: str):
+    def call(i: int) -> dict:
+        response = requests.post(f"{base_url}/factcheck", json={"text": topic(i), "bypass_cache": True}, timeout=30)
+        if response.status_code != 202:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        status_url = f"{base_url}{response.json()['statusUrl']}"
+        while True:
+            time.sleep(0.02)
+            job = requests.get(status_url, timeout=30).json()
+            if job["status"] == "done":
+                return {}
+            if job["status"] == "failed":
+                raise RuntimeError(job.get("error", "job failed"))
+
+    return call
+
+
+def stream_call(base_url: str):
+    def call(i: int) -> dict:
+        start = time.perf_counter()
+        first_token = None
+        event = None
+        with requests.get(f"{base_url}/factcheck/stream", params={"text": topic(i), "nocache": "1"},
+                          stream=True, timeout=60) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[7:]
+                    if event == "report_token" and first_token is None:
+                        first_token = (time.perf_counter() - start) * 1000
+                    elif event in ("complete", "error"):
+                        break
+        if event != "complete":
+            raise RuntimeError(f"stream ended with {event}")
+        return {"first_token": first_token} if first_token is not None else {}
+
+    return call
+
+
+def record_fixture(query: str):
+    """Saves a live GDELT artlist response as the replay fixture."""
+    params = {"query": query, "mode": "artlist", "maxrecords": "20", "format": "json", "sortby": "date"}
+    response = requests.get("https://api.gdeltproject.org/api/v2/doc/doc", params=params, timeout=30)
+    response.raise_for_status()
+    data = response.json()
+    with open(GDELT_FIXTURE, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    print(f"Recorded {len(data.get('articles', []))} articles to {GDELT_FIXTURE}")
+
+
+def bench_pipeline(args) -> dict:
+    with open(GDELT_FIXTURE, encoding="utf-8") as f:
+        gdelt_fixture = json.load(f)
+    with open(GROQ_FIXTURE, encoding="utf-8") as f:
+        groq_replies = json.load(f)
+
+    gdelt = StandIn(args.gdelt_latency_ms, args.jitter, args.gdelt_error_rate)
+    groq = StandIn(args.groq_latency_ms, args.jitter, args.groq_error_rate, seed=11)
+    gdelt_server, gdelt_url = start_server(gdelt_handler(gdelt, gdelt_fixture))
+    groq_server, groq_url = start_server(groq_handler(groq, groq_replies, args.groq_token_ms))
+    configure_environment(gdelt_url, groq_url, tempfile.mkdtemp(prefix="truthlens-bench-"))
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    results = {}
+    app_url = None
+    if {"factcheck", "stream"} & set(scenarios):
+        from werkzeug.serving import make_server
+        import server
+        app_server = make_server("127.0.0.1", 0, server.app, threaded=True)
+        threading.Thread(target=app_server.serve_forever, daemon=True).start()
+        app_url = f"http://127.0.0.1:{app_server.server_port}"
+
+    for scenario in scenarios:
+        if scenario == "pipeline":
+            results["pipeline"] = run_load(pipeline_call, args.requests, args.concurrency)
+        elif scenario == "factcheck":
+            results["factcheck"] = run_load(factcheck_call(app_url), args.requests, args.concurrency)
+        elif scenario == "stream":
+            results["stream"] = run_load(stream_call(app_url), args.requests, args.concurrency)
+        else:
+            raise SystemExit(f"Unknown scenario: {scenario}")
+
+    gdelt_server.shutdown()
+    groq_server.shutdown()
+    return {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "gdelt_latency_ms": args.gdelt_latency_ms,
+            "groq_latency_ms": args.groq_latency_ms,
+            "groq_token_ms": args.groq_token_ms,
+            "jitter": args.jitter,
+            "gdelt_error_rate": args.gdelt_error_rate,
+            "groq_error_rate": args.groq_error_rate
+        },
+        "scenarios": results,
+        "upstreams": {"gdelt": gdelt.stats(), "groq": groq.stats()}
+    }
+
+
+def parse_args(argv: list):
+    parser = argparse.ArgumentParser(description="Benchmark the fact-check pipeline against local stand-ins.")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--scenarios", default="pipeline,factcheck,stream")
+    parser.add_argument("--gdelt-latency-ms", type=float, default=300)
+    parser.add_argument("--groq-latency-ms", type=float, default=250)
+    parser.add_argument("--groq-token-ms", type=float, default=1)
+    parser.add_argument("--jitter", type=float, default=0.2, help="uniform +/- fraction applied to latency")
+    parser.add_argument("--gdelt-error-rate", type=float, default=0.0)
+    parser.add_argument("--groq-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="also write the JSON summary to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "record":
+        record_fixture(sys.argv[2])
+        sys.exit(0)
+
+    args = parse_args(sys.argv[1:])
+    # The pipeline reports progress with print(); keep stdout for the JSON summary
+    with contextlib.redirect_stdout(sys.stderr):
+        summary = json.dumps(bench_pipeline(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(summary)
+    print(summary)
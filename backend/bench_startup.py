@@ -0,0 +1,62 @@
+"""
+Startup benchmark for the backend server.
+Each run starts a fresh interpreter, imports server.py, then times the first /health
+request and how long background initialization takes to report ready.
+Prints a JSON summary; use it to track cold-start regressions.
+
+Usage: python bench_startup.py [runs]
+"""
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import server
+t_import = time.perf_counter() - t0
+
+client = server.app.test_client()
+t1 = time.perf_counter()
+client.get('/health')
+t_first = time.perf_counter() - t1
+
+t2 = time.perf_counter()
+while not server.is_ready() and time.perf_counter() - t2 < 60:
+    time.sleep(0.01)
+print(json.dumps({
+    "import_s": t_import,
+    "first_request_s": t_first,
+    "ready_s": t_import + t_first + (time.perf_counter() - t2)
+}))
+"""
+
+def run_once() -> dict:
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=backend_dir,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarize(values: list) -> dict:
+    return {
+        "min": round(min(values), 4),
+        "median": round(statistics.median(values), 4),
+        "max": round(max(values), 4)
+    }
+
+def bench_startup(runs: int = 5) -> dict:
+    samples = [run_once() for _ in range(runs)]
+    return {
+        "runs": runs,
+        "import_s": summarize([s["import_s"] for s in samples]),
+        "first_request_s": summarize([s["first_request_s"] for s in samples]),
+        "ready_s": summarize([s["ready_s"] for s in samples])
+    }
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(json.dumps(bench_startup(runs), indent=2))
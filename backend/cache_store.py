@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+
+class SQLiteCache:
+    """
+    Persistent key/value cache backed by a local SQLite file.
+    Entries expire after `ttl` seconds and the least recently used ones are evicted
+    once the cache holds more than `max_entries` rows or `max_bytes` of values.
+    Expired rows are kept on disk until `max_age` (default: `ttl`) so callers can
+    still serve them stale through `get_entry`. Values are stored as JSON.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600, max_entries: int = 1000, max_bytes: int = None,
+                 max_age: float = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max(max_age or ttl, ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def get_entry(self, key: str):
+        """
+        Returns (value, age_seconds) for a stored entry regardless of TTL, or None.
+        Does not touch the hit/miss counters.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0]), now - row[1]
+
+    def get(self, key: str):
+        """
+        Returns the cached value if present and fresh, otherwise None.
+        """
+        entry = self.get_entry(key)
+        if entry is None or entry[1] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: str, value):
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def items(self) -> list:
+        """
+        Returns [(key, value), ...] for all fresh entries, most recently used first.
+        """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM entries WHERE created_at >= ? ORDER BY accessed_at DESC", (cutoff,)
+            ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def _evict(self):
+        # Expired rows go first, then least recently used rows until both bounds hold
+        cutoff = time.time() - self.max_age
+        self.evictions += self._conn.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,)).rowcount
+
+        count, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        while count > self.max_entries or (self.max_bytes and total_bytes > self.max_bytes):
+            row = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            self.evictions += 1
+            count -= 1
+            total_bytes -= row[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,175 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+LLM_MODEL = "llama-3.3-70b-versatile"
+
+DEFAULT_SETTINGS = {
+    "groq_api_key": os.getenv("GROQ_API_KEY"),
+    # Alternative Groq-compatible endpoint, e.g. the local stand-in used by bench_pipeline.py
+    "groq_base_url": os.getenv("GROQ_BASE_URL"),
+    "groq_pool_size": int(os.getenv("GROQ_POOL_SIZE", "16")),
+    "gdelt_pool_size": int(os.getenv("GDELT_POOL_SIZE", os.getenv("GDELT_MAX_WORKERS", "5"))),
+    "http_timeout": float(os.getenv("UPSTREAM_TIMEOUT", "60")),
+    # Groq calls are retried by the rate limiter (rate_limit.py), which honours its pauses and buckets
+    "groq_max_retries": int(os.getenv("GROQ_MAX_RETRIES", "0")),
+}
+
+
+class ConnectionStats:
+    """
+    Counts requests and newly opened connections for an httpx client.
+    httpcore reports connection setup through the per-request "trace" extension.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self.trace
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reuse_rate": round(reused / self.requests, 3) if self.requests else 0.0
+            }
+
+
+class ClientRegistry:
+    """
+    Process-wide, thread-safe owner of long-lived upstream clients.
+    Each client is built once on first use from the registry settings and shared by every
+    request, so pooled keep-alive connections (and their TLS sessions) are reused:
+    - Groq SDK client (Whisper) and LangChain ChatGroq share one pooled httpx client
+    - GDELT uses a pooled requests.Session
+    - the DuckDuckGo fallback tool is instantiated once
+    """
+
+    def __init__(self, **settings):
+        self.settings = dict(DEFAULT_SETTINGS, **settings)
+        self._clients = {}
+        self._lock = threading.RLock()
+        self.groq_stats = ConnectionStats()
+
+    def _get(self, name: str, factory):
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = factory()
+                    self._clients[name] = client
+        return client
+
+    def groq_http(self):
+        def build():
+            import httpx
+            pool_size = self.settings["groq_pool_size"]
+            return httpx.Client(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                timeout=self.settings["http_timeout"],
+                event_hooks={"request": [self.groq_stats.on_request]}
+            )
+        return self._get("groq_http", build)
+
+    def _groq_endpoint(self) -> dict:
+        return {"base_url": self.settings["groq_base_url"]} if self.settings["groq_base_url"] else {}
+
+    def groq(self):
+        """Groq SDK client (audio transcription)."""
+        def build():
+            from groq import Groq
+            return Groq(
+                api_key=self.settings["groq_api_key"],
+                http_client=self.groq_http(),
+                max_retries=self.settings["groq_max_retries"],
+                **self._groq_endpoint()
+            )
+        return self._get("groq", build)
+
+    def llm(self):
+        """LangChain ChatGroq for the fact-check prompts, or None without an API key."""
+        if not self.settings["groq_api_key"]:
+            return None
+
+        def build():
+            from langchain_groq import ChatGroq
+            return ChatGroq(
+                temperature=0,
+                model_name=LLM_MODEL,
+                api_key=self.settings["groq_api_key"],
+                http_client=self.groq_http(),
+                max_retries=self.settings["groq_max_retries"],
+                **self._groq_endpoint()
+            )
+        return self._get("llm", build)
+
+    def gdelt(self):
+        """Pooled requests.Session for the GDELT DOC API."""
+        def build():
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.settings["gdelt_pool_size"])
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            return session
+        return self._get("gdelt", build)
+
+    def search(self):
+        """DuckDuckGo search tool for the web fallback."""
+        def build():
+            from langchain_community.tools import DuckDuckGoSearchRun
+            return DuckDuckGoSearchRun()
+        return self._get("search", build)
+
+    def gdelt_stats(self) -> dict:
+        session = self._clients.get("gdelt")
+        requests_made = 0
+        connections = 0
+        if session is not None:
+            # http:// and https:// share one adapter; count each pool once
+            adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+            for adapter in adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        requests_made += pool.num_requests
+                        connections += pool.num_connections
+        reused = max(0, requests_made - connections)
+        return {
+            "requests": requests_made,
+            "new_connections": connections,
+            "reuse_rate": round(reused / requests_made, 3) if requests_made else 0.0
+        }
+
+    def stats(self) -> dict:
+        return {
+            "pool_sizes": {
+                "groq": self.settings["groq_pool_size"],
+                "gdelt": self.settings["gdelt_pool_size"]
+            },
+            "initialized": sorted(self._clients),
+            "groq": self.groq_stats.snapshot(),
+            "gdelt": self.gdelt_stats()
+        }
+
+
+# Shared registry used by the fact checker and the server
+registry = ClientRegistry()
@@ -0,0 +1,137 @@
+import os
+import math
+from collections import Counter
+from similarity import STOPWORDS, tokenize
+
+# Token budget for the variable parts of the synthesis prompt: topic, bias analysis and articles
+SYNTHESIS_TOKEN_BUDGET = int(os.getenv("SYNTHESIS_TOKEN_BUDGET", "1800"))
+# Share of the budget the topic may use before it is truncated (long transcripts)
+TOPIC_TOKEN_SHARE = float(os.getenv("SYNTHESIS_TOPIC_SHARE", "0.35"))
+BIAS_TOKEN_LIMIT = 120
+MAX_ARTICLES_PER_PERSPECTIVE = 5
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough count for English text; good enough for budgeting without a tokenizer
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cuts `text` to about `max_tokens` tokens at a word boundary, marking the cut.
+    """
+    text = text or ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(0, max_tokens * CHARS_PER_TOKEN - 15)].rsplit(" ", 1)[0]
+    return f"{cut} [...truncated]"
+
+
+def terms(text: str) -> list:
+    # Same 5-character prefix stemming as the claim similarity features
+    return [tok[:5] for tok in tokenize(text) if tok not in STOPWORDS]
+
+
+class BM25:
+    """
+    Okapi BM25 over a small in-memory corpus of token lists.
+    """
+
+    def __init__(self, docs: list, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = [Counter(doc) for doc in docs]
+        self.lengths = [len(doc) for doc in docs]
+        self.avg_length = (sum(self.lengths) / len(docs)) if docs else 0.0
+        df = Counter(term for doc in self.docs for term in doc)
+        n = len(docs)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def scores(self, query: list) -> list:
+        results = []
+        for doc, length in zip(self.docs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            score = 0.0
+            for term in set(query):
+                tf = doc.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+def format_article(art: dict) -> str:
+    copies = art.get("syndication_count", 1)
+    syndicated = f" [carried by {copies} outlets]" if copies > 1 else ""
+    return f"- {art['title']} ({art['domain']}, {art['sourcecountry']}){syndicated} - {art['url']}"
+
+
+def build_context(topic: str, input_bias: str, perspective_data: dict, budget: int = SYNTHESIS_TOKEN_BUDGET) -> dict:
+    """
+    Fits the topic, bias analysis and article context into `budget` tokens.
+    The topic is truncated to its share of the budget and the bias analysis to a fixed cap
+    (it appears twice in the prompt). Articles are scored against the topic with BM25 over
+    their titles and added greedily: first the best article of every perspective, for
+    coverage, then the rest by score, at most 5 per perspective, while they fit. Text
+    results (the web search fallback) take what is left.
+    Returns {"topic", "input_bias", "context", "articles_used", "tokens"}.
+    """
+    topic_text = truncate_tokens(topic, int(budget * TOPIC_TOKEN_SHARE))
+    bias_text = truncate_tokens(input_bias, BIAS_TOKEN_LIMIT)
+    remaining = budget - estimate_tokens(topic_text) - 2 * estimate_tokens(bias_text)
+
+    candidates = [
+        (perspective, position, art)
+        for perspective, articles in perspective_data.items() if isinstance(articles, list)
+        for position, art in enumerate(articles)
+    ]
+    scores = BM25([terms(art.get("title", "")) for _, _, art in candidates]).scores(terms(topic))
+    # Best first; ties keep retrieval order
+    ranked = sorted(range(len(candidates)), key=lambda i: (-scores[i], i))
+
+    coverage = []
+    covered = set()
+    for i in ranked:
+        if candidates[i][0] not in covered:
+            covered.add(candidates[i][0])
+            coverage.append(i)
+    first = set(coverage)
+    order = coverage + [i for i in ranked if i not in first]
+
+    selected = {}
+    for i in order:
+        perspective, _, art = candidates[i]
+        chosen = selected.setdefault(perspective, [])
+        if len(chosen) >= MAX_ARTICLES_PER_PERSPECTIVE:
+            continue
+        cost = estimate_tokens(format_article(art)) + 1
+        if not chosen:
+            cost += estimate_tokens(f"### {perspective} PERSPECTIVE:\n")
+        if cost > remaining:
+            continue
+        chosen.append(i)
+        remaining -= cost
+
+    context_parts = []
+    for perspective, articles in perspective_data.items():
+        if isinstance(articles, list):
+            chosen = sorted(selected.get(perspective, []), key=lambda i: (-scores[i], i))
+            if chosen:
+                context_parts.append(
+                    f"### {perspective} PERSPECTIVE:\n" + "\n".join(format_article(candidates[i][2]) for i in chosen)
+                )
+        elif articles:
+            header = f"### {perspective} PERSPECTIVE:\n"
+            text = truncate_tokens(str(articles), max(0, remaining - estimate_tokens(header)))
+            remaining -= estimate_tokens(header + text)
+            context_parts.append(header + text)
+
+    context = "\n\n".join(context_parts)
+    return {
+        "topic": topic_text,
+        "input_bias": bias_text,
+        "context": context,
+        "articles_used": sum(len(chosen) for chosen in selected.values()),
+        "tokens": estimate_tokens(topic_text) + 2 * estimate_tokens(bias_text) + estimate_tokens(context)
+    }
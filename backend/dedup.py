@@ -0,0 +1,75 @@
+import os
+import re
+from article_store import canonical_url
+from similarity import LSHIndex, shingles
+
+DEDUP_TITLE_THRESHOLD = float(os.getenv("DEDUP_TITLE_THRESHOLD", "0.5"))
+MAX_SYNDICATED_DOMAINS = 10
+
+# "Headline - Reuters", "Headline | AP News": the outlet suffix differs between copies
+_TITLE_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,40}$")
+
+
+def title_features(title: str) -> set:
+    return shingles(_TITLE_SUFFIX.sub("", title or ""))
+
+
+def dedup_articles(perspective_data: dict, threshold: float = DEDUP_TITLE_THRESHOLD) -> tuple:
+    """
+    Collapses syndicated copies of the same story across and within perspectives.
+    Articles are first keyed by canonical URL (tracking parameters and "www." ignored), then
+    near-identical headlines are clustered with MinHash/LSH over word shingles, so the pass is
+    linear in the number of articles. Each perspective keeps its own first copy of every
+    story it retrieved (its outlet and URL), while the unique articles hold one copy per
+    story: the first, in perspective and relevance order. Every kept copy carries the
+    cluster's `syndication_count` (copies seen) and `syndicated_by` (their domains).
+    Returns (perspective_data with one copy per story, list of unique articles).
+    """
+    index = LSHIndex()
+    by_url = {}
+    clusters = []
+    kept = {}
+
+    for perspective, articles in perspective_data.items():
+        if not isinstance(articles, list):
+            kept[perspective] = articles
+            continue
+        entries = []
+        seen = set()
+        for art in articles:
+            url_key = canonical_url(art.get("url", ""))
+            cluster_id = by_url.get(url_key)
+            features = title_features(art.get("title", ""))
+            if cluster_id is None and features:
+                matches = index.query(features, threshold)
+                if matches:
+                    cluster_id = matches[0][0]
+
+            if cluster_id is None:
+                cluster_id = len(clusters)
+                clusters.append({"first": art, "count": 0, "domains": []})
+                if features:
+                    index.add(cluster_id, features)
+            by_url.setdefault(url_key, cluster_id)
+
+            cluster = clusters[cluster_id]
+            cluster["count"] += 1
+            domain = art.get("domain")
+            if domain and domain not in cluster["domains"] and len(cluster["domains"]) < MAX_SYNDICATED_DOMAINS:
+                cluster["domains"].append(domain)
+            if cluster_id not in seen:
+                seen.add(cluster_id)
+                entries.append((art, cluster_id))
+        kept[perspective] = entries
+
+    # Counts are final only once every copy has been seen
+    def annotate(art, cluster):
+        return dict(art, syndication_count=cluster["count"], syndicated_by=list(cluster["domains"]))
+
+    deduped = {
+        perspective: [annotate(art, clusters[cluster_id]) for art, cluster_id in entries]
+        if isinstance(entries, list) else entries
+        for perspective, entries in kept.items()
+    }
+    unique_articles = [annotate(cluster["first"], cluster) for cluster in clusters]
+    return deduped, unique_articles
@@ -1,87 +1,263 @@
 import os
+import re
+import time
 import requests
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_core.messages import HumanMessage
+from concurrent.futures import ThreadPoolExecutor, wait
 import json
+from clients import registry
+from pipeline import StageGraph, Deadline
+from gdelt_cache import GDELTCache, GDELT_CACHE_ENABLED
+from dedup import dedup_articles
+from context import build_context, estimate_tokens
+from metrics import metrics
+from rate_limit import Throttled, as_throttled, retry_after_from, gdelt_limiter, groq_limiter
+from source_index import get_source_index, PERSPECTIVES
+
+GDELT_API_URL = os.getenv("GDELT_API_URL", "https://api.gdeltproject.org/api/v2/doc/doc")
+PERSPECTIVE_LABELS = ["GENERAL", "LEFT", "RIGHT", "CENTER", "INTERNATIONAL"]
+RETRIEVAL_WORKERS = int(os.getenv("GDELT_MAX_WORKERS", "5"))
+# "perspectives": one GDELT query per perspective; "wide": one broad query bucketed locally by the source index;
+# "auto": perspectives while the GDELT rate limit can send all of them in time, wide otherwise
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "auto").lower()
+GDELT_WIDE_MAX_RECORDS = int(os.getenv("GDELT_WIDE_MAX_RECORDS", "75"))
+
+# Latency budget (seconds) for one fact check; 0 disables the deadline
+FACTCHECK_BUDGET_S = float(os.getenv("FACTCHECK_BUDGET_S", "45"))
+# Part of the budget held back for synthesis: retrieval stops waiting when only this is left
+SYNTHESIS_RESERVE_S = float(os.getenv("SYNTHESIS_RESERVE_S", "12"))
+GDELT_TIMEOUT_S = 10
+# How long a background cache refresh waits for a GDELT rate limiter slot before giving up
+GDELT_REFRESH_WAIT_S = 60
+LLM_TIMEOUT_S = 60
+# Output allowance added to the prompt estimate when reserving LLM tokens per minute
+LLM_OUTPUT_TOKENS = int(os.getenv("LLM_OUTPUT_TOKENS", "1024"))
+
+# Shared GDELT response cache (disable with GDELT_CACHE_ENABLED=0)
+gdelt_cache = GDELTCache() if GDELT_CACHE_ENABLED else None
+
+def get_gdelt_session():
+    """
+    Returns the process-wide GDELT session from the client registry.
+    Keep-alive connections are pooled so concurrent perspective queries skip the TLS handshake.
+    """
+    return registry.gdelt()
 
-# Load environment variables
-load_dotenv()
+# LangChain packages are heavy to import; they are loaded on first use (or by warm_up)
+# so the server can start answering before they are needed.
+def human_message(content: str):
+    from langchain_core.messages import HumanMessage
+    return HumanMessage(content=content)
 
-def generate_gdelt_queries(topic: str, llm) -> list:
+def record_llm_usage(call: str, usage):
+    # LangChain reports {"input_tokens", "output_tokens", "total_tokens"} on the message
+    if usage:
+        metrics.inc("llm_tokens_total", usage.get("input_tokens", 0), call=call, kind="input")
+        metrics.inc("llm_tokens_total", usage.get("output_tokens", 0), call=call, kind="output")
+
+def invoke_llm(llm, prompt: str, call: str, timeout: float = None, json_mode: bool = False):
     """
-    Generate multiple GDELT-optimized queries targeting different political perspectives.
-    Returns a list of query strings with OR operators.
+    Single LLM request, timed as an `llm_request` span labelled with the call name.
+    `timeout` (seconds) bounds the whole call: the wait for a rate limiter slot, the Groq
+    request and any retries (on HTTP 429 or a transient 5xx).
+    `json_mode` asks Groq to constrain the reply to a JSON object.
     """
-    prompt = f"""Generate GDELT search queries for the topic: "{topic}"
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+    end = time.monotonic() + timeout if timeout else None
 
-Create 5 different query variations targeting political perspectives:
-1. GENERAL: Main keywords with OR operators - 5-8 relevant terms
-2. LEFT: Keywords + left-leaning sources and critical angles
-3. RIGHT: Keywords + right-leaning sources and supportive angles  
-4. CENTER: Keywords + mainstream/centrist sources
-5. INTERNATIONAL: Keywords + international/non-US perspectives
+    def request():
+        if end is not None:
+            extra["timeout"] = max(1.0, end - time.monotonic())
+        try:
+            with metrics.span("llm_request", call=call):
+                return llm.invoke([human_message(prompt)], **extra)
+        except Exception as e:
+            throttled = as_throttled("groq", e)
+            if throttled:
+                raise throttled from e
+            raise
 
-Format each as: (keyword1 OR keyword2 OR keyword3 OR ...)
-Use quotes for exact phrases like "U.S. military" or "climate change"
-Include synonyms, acronyms, and related terms.
+    response = groq_limiter.call(request, cost=estimate_tokens(prompt) + LLM_OUTPUT_TOKENS, timeout=timeout)
+    record_llm_usage(call, getattr(response, "usage_metadata", None))
+    return response
 
-Example for "US troops Greenland":
-GENERAL: ("us military" OR "u.s. military" OR pentagon OR "us troops" OR "american forces" OR "u.s. army" OR "united states military") AND greenland
-LEFT: ("us military" OR pentagon OR "us troops") AND greenland AND (domain:cnn.com OR domain:msnbc.com OR domain:theguardian.com OR imperialism OR expansion OR sovereignty)
-RIGHT: ("us military" OR pentagon OR "us troops") AND greenland AND (domain:foxnews.com OR domain:breitbart.com OR domain:nypost.com OR defense OR security OR strategy)
-CENTER: ("us military" OR pentagon OR "us troops") AND greenland AND (domain:reuters.com OR domain:apnews.com OR domain:bbc.com)
-INTERNATIONAL: ("us military" OR pentagon OR "us troops") AND greenland AND (sourcecountry:DK OR sourcecountry:GL OR sourcecountry:RU OR sourcecountry:CN OR sourcecountry:EU)
+def stream_llm(llm, prompt: str, call: str, timeout: float = None):
+    """
+    Streaming variant of invoke_llm; yields the chunks.
+    It waits for a rate limiter slot but is not retried, since tokens may already have been emitted.
+    """
+    usage = None
+    extra = {"timeout": timeout} if timeout else {}
+    if not groq_limiter.acquire(estimate_tokens(prompt) + LLM_OUTPUT_TOKENS, timeout=timeout):
+        raise Throttled("groq")
+    with metrics.span("llm_request", call=call):
+        for chunk in llm.stream([human_message(prompt)], **extra):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            yield chunk
+    record_llm_usage(call, usage)
+
+def warm_up():
+    """
+    Builds the shared LLM and Groq clients ahead of the first request.
+    The DuckDuckGo fallback is rarely used and stays lazy.
+    """
+    import langchain_core.messages  # noqa: F401
+    registry.llm()
+    registry.groq()
 
-Now generate for: "{topic}"
-Return ONLY the 5 queries, one per line, labeled GENERAL:, LEFT:, RIGHT:, CENTER:, INTERNATIONAL:"""
+def perspective_label(idx: int) -> str:
+    return PERSPECTIVE_LABELS[idx] if idx < len(PERSPECTIVE_LABELS) else f"QUERY_{idx+1}"
 
-    try:
-        response = llm.invoke([HumanMessage(content=prompt)])
-        lines = response.content.strip().split('\n')
-        
-        queries = []
-        for line in lines:
-            if ':' in line:
-                query = line.split(':', 1)[1].strip()
-                if query:
-                    queries.append(query)
-        
-        return queries if len(queries) >= 3 else [topic, topic, topic]
-    except Exception as e:
-        print(f"Query generation error: {e}")
-        return [topic, topic, topic]
+BIAS_LABELS = ("LEFT-LEANING", "RIGHT-LEANING", "CENTER/NEUTRAL")
+UNKNOWN_BIAS = "UNKNOWN: Error during analysis"
+_BIAS_WORDS = {"LEFT": "LEFT-LEANING", "RIGHT": "RIGHT-LEANING", "CENTER": "CENTER/NEUTRAL", "CENTRE": "CENTER/NEUTRAL", "NEUTRAL": "CENTER/NEUTRAL"}
+
+_JSON_FIELD = re.compile(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_LABELED_LINE = re.compile(r"^\W*(" + "|".join(PERSPECTIVE_LABELS) + r")[\s*]*:[\s*]*(.+)$", re.IGNORECASE)
+_BIAS_LINE = re.compile(r"^\W*(LEFT|RIGHT|CENTER|NEUTRAL)[\w/-]*\W*:\s*(.+)", re.IGNORECASE)
+
+# Field guidance shared by the single and batch planning prompts
+PLAN_BIAS_SCHEMA = '{"label": "LEFT-LEANING" | "RIGHT-LEANING" | "CENTER/NEUTRAL", "explanation": "one sentence"}'
+PLAN_FIELDS = """bias: the political lean of the text. LEFT-LEANING: progressive, liberal, social justice focus. RIGHT-LEANING: conservative, traditional, market focus. CENTER/NEUTRAL: objective reporting, balanced viewpoints.
+queries: GDELT searches of 5-8 keywords, synonyms and quoted phrases joined with OR, like ("us troops" OR pentagon) AND greenland.
+LEFT, RIGHT and CENTER add domain: filters for outlets of that lean (e.g. domain:cnn.com, domain:foxnews.com, domain:reuters.com); INTERNATIONAL adds sourcecountry: filters (e.g. sourcecountry:DK) for the countries involved."""
 
-def analyze_input_bias(topic: str, llm) -> str:
+def plan_queries_schema(labels: tuple) -> str:
+    return "{" + ", ".join(f'"{label}": "..."' for label in labels) + "}"
+
+def build_plan_prompt(topic: str, labels: tuple) -> str:
+    return f"""Plan a fact check of the following text:
+"{topic}"
+
+Return ONLY a JSON object:
+{{"bias": {PLAN_BIAS_SCHEMA}, "queries": {plan_queries_schema(labels)}}}
+
+{PLAN_FIELDS}"""
+
+def normalize_bias_label(label: str):
+    # "LEFT", "Left-leaning", "NEUTRAL" ... -> one of BIAS_LABELS
+    word = re.split(r"[-/\s]", (label or "").strip().upper(), 1)[0]
+    return _BIAS_WORDS.get(word)
+
+def validate_bias(bias) -> str:
     """
-    Analyzes the political bias of the input transcript or text.
-    Returns a classification: LEFT, RIGHT, or CENTER.
+    Normalizes a plan's bias object to "LABEL: explanation" (or just the label);
+    a missing or invalid label becomes UNKNOWN_BIAS.
     """
-    prompt = f"""Analyze the political bias of the following text:
-"{topic}"
+    label = normalize_bias_label(bias.get("label")) if isinstance(bias, dict) else None
+    explanation = bias.get("explanation") if isinstance(bias, dict) else None
+    if label and isinstance(explanation, str) and explanation.strip():
+        return f"{label}: {explanation.strip()}"
+    return label or UNKNOWN_BIAS
 
-Classify it as one of:
-- LEFT-LEANING (Progressive, Liberal, Social Justice focus)
-- RIGHT-LEANING (Conservative, Traditional, Market-focus)
-- CENTER/NEUTRAL (Objective reporting, balanced viewpoints)
+def validate_plan(data, labels: tuple) -> dict:
+    """
+    Checks a parsed plan against the schema and normalizes it.
+    Returns {"input_bias": "LABEL: explanation", "queries": {label: query}}; raises ValueError
+    when the GENERAL query is missing. Other missing queries are left out, and a missing or
+    invalid bias becomes UNKNOWN_BIAS.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("plan is not an object")
+    queries = data.get("queries")
+    if not isinstance(queries, dict):
+        raise ValueError("plan has no queries object")
+    queries = {label: " ".join(queries[label].split()) for label in labels if isinstance(queries.get(label), str)}
+    queries = {label: query for label, query in queries.items() if query}
+    if "GENERAL" not in queries:
+        raise ValueError("plan has no GENERAL query")
+    return {"input_bias": validate_bias(data.get("bias")), "queries": queries}
+
+def json_string(raw: str) -> str:
+    try:
+        return json.loads(f'"{raw}"')
+    except ValueError:
+        return raw
 
-Return ONLY the classification label and a 1-sentence explanation of why it fits that label.
-Format: [LABEL]: [Explanation]"""
+def json_fields(content: str) -> dict:
+    """
+    Quoted "key": "value" fields of a possibly malformed JSON text, keyed in upper case.
+    """
+    return {key.upper(): json_string(value) for key, value in _JSON_FIELD.findall(content)}
 
+def parse_plan(content: str, labels: tuple) -> dict:
+    """
+    Parses the planning reply: the JSON object if it is well formed, otherwise the quoted
+    "key": "value" fields of a truncated or malformed object, otherwise labeled lines
+    ("LEFT: ...", "CENTER/NEUTRAL: ..."). Raises ValueError if none of them has a GENERAL query.
+    """
+    content = (content or "").strip()
+    start, end = content.find("{"), content.rfind("}")
+    if start != -1 and end > start:
+        try:
+            return validate_plan(json.loads(content[start:end + 1]), labels)
+        except ValueError as e:
+            print(f"Plan JSON rejected ({e}), using fallback parser")
+
+    fields = json_fields(content)
+    queries = {}
+    bias = {"label": fields.get("LABEL"), "explanation": fields.get("EXPLANATION")}
+    for line in content.split("\n"):
+        match = _LABELED_LINE.match(line.strip())
+        if match:
+            queries.setdefault(match.group(1).upper(), match.group(2).strip().rstrip(",").strip('"'))
+        elif not bias["label"]:
+            match = _BIAS_LINE.match(line.strip())
+            if match:
+                bias = {"label": match.group(1), "explanation": match.group(2)}
+    for label in labels:
+        if label in fields:
+            queries[label] = fields[label]
+    return validate_plan({"bias": bias, "queries": queries}, labels)
+
+def distinct_queries(queries: dict, labels: tuple) -> dict:
+    """
+    Keeps the planned queries in label order, dropping any that repeats an earlier
+    perspective's query (it would fetch the same articles twice).
+    """
+    distinct = {}
+    for label in labels:
+        query = queries.get(label)
+        if query and query.lower() not in (q.lower() for q in distinct.values()):
+            distinct[label] = query
+    return distinct
+
+def plan_fact_check(topic: str, llm, timeout: float = None, labels: tuple = tuple(PERSPECTIVE_LABELS)) -> dict:
+    """
+    Classifies the political lean of the input and writes its GDELT queries in one LLM call
+    that returns JSON (see build_plan_prompt). Only the perspectives in `labels` are requested.
+    Returns {"input_bias": "LABEL: explanation", "queries": {label: query}} in label order.
+    Perspectives the reply left out, or gave another perspective's query, are not searched,
+    and an unusable reply falls back to the topic as the only (GENERAL) query.
+    """
     try:
-        response = llm.invoke([HumanMessage(content=prompt)])
-        return response.content.strip()
+        response = invoke_llm(llm, build_plan_prompt(topic, labels), "plan", timeout, json_mode=True)
+        plan = parse_plan(response.content, labels)
+        queries = distinct_queries(plan["queries"], labels)
+        missing = [label for label in labels if label not in queries]
+        if missing:
+            print(f"Plan has no distinct query for {', '.join(missing)}; not searching them")
+        return {"input_bias": plan["input_bias"], "queries": queries}
     except Exception as e:
-        print(f"Bias analysis error: {e}")
-        return "UNKNOWN: Error during analysis"
+        print(f"Planning error: {e}")
+        return {"input_bias": UNKNOWN_BIAS, "queries": {"GENERAL": topic}}
+
+def use_wide_retrieval(queries: int, window: float = None) -> bool:
+    """
+    Whether to retrieve with one wide query instead of `queries` perspective queries.
+    In "auto" mode that is when the GDELT rate limiter, with the callers already queued,
+    could not start all of them within `window` seconds (None: no limit).
+    """
+    if RETRIEVAL_MODE != "auto":
+        return RETRIEVAL_MODE == "wide"
+    return window is not None and gdelt_limiter.delay(queries) > window
 
-def gdelt_search(query: str, max_records: int = 20) -> dict:
+def gdelt_search(query: str, max_records: int = 20, timeout: float = GDELT_TIMEOUT_S, wait: float = None) -> dict:
     """
-    Searches the GDELT Project for news coverage.
+    Searches the GDELT Project for news coverage, through the on-disk response cache.
+    `timeout` applies to each HTTP request; `wait` bounds the time spent waiting for rate
+    limiter slots (None: no bound).
     Returns dict with articles list and metadata.
     """
-    base_url = "https://api.gdeltproject.org/api/v2/doc/doc"
     params = {
         "query": query,
         "mode": "artlist",
@@ -90,13 +266,43 @@ def gdelt_search(query: str, max_records: int = 20) -> dict:
         "sortby": "date"
     }
     
-    try:
-        response = requests.get(base_url, params=params, timeout=10)
+    if gdelt_cache is None:
+        return fetch_gdelt(params, timeout, wait)
+    # The request's wait may be cut to its remaining budget; background refreshes get their own
+    return gdelt_cache.fetch(
+        params,
+        lambda: fetch_gdelt(params, timeout, wait),
+        lambda: fetch_gdelt(params, GDELT_TIMEOUT_S, GDELT_REFRESH_WAIT_S)
+    )
+
+def fetch_gdelt(params: dict, timeout: float = GDELT_TIMEOUT_S, wait: float = None) -> dict:
+    """
+    Calls the GDELT DOC API directly and formats the returned articles.
+    Each call is timed as a `gdelt_request` span and counted by outcome. Requests go through
+    the GDELT rate limiter; throttled responses (HTTP 429, or the plain-text "limit requests"
+    notice GDELT sends with a 200) are retried there with backoff.
+    `wait` bounds the whole call, slot waits and pauses included (None: no bound); each HTTP
+    request gets the full `timeout`, however long it waited for its slot.
+    """
+    def request():
+        with metrics.span("gdelt_request"):
+            response = get_gdelt_session().get(GDELT_API_URL, params=params, timeout=timeout)
+        if response.status_code == 429:
+            raise Throttled("GDELT", retry_after_from(response))
         response.raise_for_status()
-        data = response.json()
+        try:
+            return response.json()
+        except ValueError:
+            if "limit requests" in response.text.lower():
+                raise Throttled("GDELT", retry_after_from(response))
+            raise
+
+    try:
+        data = gdelt_limiter.call(request, timeout=wait)
         
         articles = data.get('articles', [])
         if not articles:
+            metrics.inc("gdelt_requests_total", outcome="empty")
             return {"articles": [], "error": f"No articles found"}
         
         # Format articles with all metadata including images
@@ -125,112 +331,114 @@ def gdelt_search(query: str, max_records: int = 20) -> dict:
                 
             formatted_articles.append(article_data)
             
+        metrics.inc("gdelt_requests_total", outcome="ok")
         return {"articles": formatted_articles, "count": len(formatted_articles)}
         
     except requests.exceptions.Timeout:
+        metrics.inc("gdelt_requests_total", outcome="timeout")
         return {"articles": [], "error": "Request timeout"}
+    except Throttled as e:
+        metrics.inc("gdelt_requests_total", outcome="throttled")
+        return {"articles": [], "error": str(e), "throttled": True}
     except Exception as e:
+        metrics.inc("gdelt_requests_total", outcome="error")
         return {"articles": [], "error": str(e)}
 
-def run_fact_check(topic: str):
+def retrieve_perspectives(queries: list, on_result=None, deadline: Deadline = None) -> dict:
     """
-    Enhanced Fact Check Pipeline with political perspective analysis:
-    1. GENERATE: Create multiple GDELT queries for different perspectives
-    2. RETRIEVE: Execute queries and collect articles
-    3. REPORT: Synthesize with political perspective breakdown
+    Executes the perspective queries concurrently over the shared GDELT session.
+    `queries` is a list in perspective order or a {perspective: query} dict.
+    Queries wait for GDELT rate limiter slots until the deadline (less the synthesis reserve);
+    each HTTP request then gets the full GDELT_TIMEOUT_S.
+    Returns dict with articles per perspective (in query order), per-query latency in ms and
+    the perspectives skipped because they did not answer before the deadline (less the
+    synthesis reserve) or were still rate limited after retries. `on_result(perspective, articles, latency_ms)` is called as each query completes.
     """
-    load_dotenv()
-    groq_api_key = os.getenv("GROQ_API_KEY")
-    if not groq_api_key:
-        return json.dumps({"error": "GROQ_API_KEY not found", "articles": []})
-
-    llm = ChatGroq(temperature=0, model_name="llama-3.3-70b-versatile", api_key=groq_api_key)
-
-    print(f"\n{'='*60}")
-    print(f"FACT-CHECKING: {topic}")
-    print(f"{'='*60}\n")
+    deadline = deadline or Deadline()
+    if isinstance(queries, dict):
+        labelled = list(queries.items())[:5]
+    else:
+        labelled = [(perspective_label(idx), query) for idx, query in enumerate(queries[:5])]
 
-    # --- STEP 1: BIAS & QUERY GENERATION ---
-    print("Step 1: Analyzing input bias and generating queries...")
-    input_bias_result = analyze_input_bias(topic, llm)
-    queries = generate_gdelt_queries(topic, llm)
-    
-    perspective_labels = ["GENERAL", "LEFT", "RIGHT", "CENTER", "INTERNATIONAL"]
-    print(f"Generated {len(queries)} queries:")
-    for i, q in enumerate(queries[:5]):
-        label = perspective_labels[i] if i < 5 else f"QUERY_{i+1}"
-        print(f"  {label}: {q[:80]}...")
-
-    # --- STEP 2: RETRIEVAL ---
-    print("\nStep 2: Retrieving articles from GDELT...")
-    all_articles = []
-    perspective_data = {}
-    
-    for idx, query in enumerate(queries[:5]):
-        perspective = perspective_labels[idx] if idx < 5 else f"QUERY_{idx+1}"
-        
-        try:
-            print(f"\n  Executing {perspective} query...")
-            result = gdelt_search(query)
-            
-            if result.get("articles"):
-                articles = result["articles"]
-                perspective_data[perspective] = articles
-                all_articles.extend(articles)
-                print(f"    ✓ Found {len(articles)} articles")
-            else:
-                perspective_data[perspective] = []
-                print(f"    ✗ No articles found")
-        except Exception as e:
-            perspective_data[perspective] = []
-            print(f"    ✗ Error: {e}")
-    
-    # Deduplicate articles by URL
-    seen_urls = set()
-    unique_articles = []
-    for art in all_articles:
-        if art["url"] not in seen_urls:
-            seen_urls.add(art["url"])
-            unique_articles.append(art)
-    
-    print(f"\n  Total unique articles: {len(unique_articles)}")
-    
-    # Fallback to DuckDuckGo if no GDELT results
-    if not unique_articles:
-        print("\n  ⚠ No GDELT results. Trying DuckDuckGo fallback...")
+    def timed_search(perspective, query):
+        start = time.perf_counter()
         try:
-            ddg = DuckDuckGoSearchRun()
-            web_res = ddg.invoke(topic)
-            perspective_data["WEB_SEARCH"] = web_res
+            result = gdelt_search(query, wait=deadline.remaining(reserve=SYNTHESIS_RESERVE_S))
         except Exception as e:
-            print(f"    ✗ Web search failed: {e}")
-
-    if not unique_articles and "WEB_SEARCH" not in perspective_data:
-        return json.dumps({
-            "error": "No data retrieved from any source",
-            "articles": [],
-            "perspectives": {}
-        })
+            result = {"articles": [], "error": str(e)}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if on_result:
+            on_result(perspective, result.get("articles") or [], round(elapsed_ms, 1))
+        return result, elapsed_ms
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(RETRIEVAL_WORKERS, len(labelled))))
+    futures = [(label, pool.submit(timed_search, label, query)) for label, query in labelled]
+    # Stragglers are abandoned at the deadline; their responses still warm the GDELT cache
+    wait([future for _, future in futures], timeout=deadline.remaining(reserve=SYNTHESIS_RESERVE_S))
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    # Merge in query order so perspective_data is deterministic regardless of completion order
+    perspective_data = {}
+    latency_ms = {}
+    skipped = []
+    throttled = []
+    for perspective, future in futures:
+        if not future.done() or future.cancelled():
+            skipped.append(perspective)
+            print(f"  {perspective}: ⏱ Skipped (deadline)")
+            continue
+        result, elapsed_ms = future.result()
+        latency_ms[perspective] = round(elapsed_ms, 1)
+        perspective_data[perspective] = result.get("articles") or []
+        if result.get("throttled"):
+            throttled.append(perspective)
+
+        if perspective_data[perspective]:
+            print(f"  {perspective}: ✓ Found {len(perspective_data[perspective])} articles ({elapsed_ms:.0f} ms)")
+        else:
+            print(f"  {perspective}: ✗ {result.get('error', 'No articles found')} ({elapsed_ms:.0f} ms)")
+
+    return {"perspectives": perspective_data, "latency_ms": latency_ms, "skipped": skipped, "throttled": throttled}
+
+def retrieve_wide(query: str, on_result=None, deadline: Deadline = None) -> dict:
+    """
+    Runs one broad GDELT query for up to GDELT_WIDE_MAX_RECORDS articles and assigns each
+    article to a perspective locally with the source index (domain lean, then source country).
+    Returns the same fields as retrieve_perspectives, with every perspective present; latency
+    is reported for the single query. `on_result` is called once per perspective.
+    """
+    deadline = deadline or Deadline()
+    index = get_source_index()
+    start = time.perf_counter()
+    try:
+        result = gdelt_search(query, max_records=GDELT_WIDE_MAX_RECORDS, wait=deadline.remaining(reserve=SYNTHESIS_RESERVE_S))
+    except Exception as e:
+        result = {"articles": [], "error": str(e)}
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    articles = result.get("articles") or []
+    if not articles:
+        print(f"  WIDE: ✗ {result.get('error', 'No articles found')} ({elapsed_ms:.0f} ms)")
+    perspective_data = index.assign(articles)
+    for perspective, assigned in perspective_data.items():
+        if articles:
+            print(f"  {perspective}: ✓ Assigned {len(assigned)} of {len(articles)} articles")
+        if on_result:
+            on_result(perspective, assigned, round(elapsed_ms, 1))
+
+    return {
+        "perspectives": perspective_data,
+        "latency_ms": {"WIDE": round(elapsed_ms, 1)},
+        "skipped": [],
+        "throttled": list(PERSPECTIVES) if result.get("throttled") else [],
+        "source_index": index.version
+    }
 
-    # --- STEP 3: SYNTHESIS ---
-    print("\nStep 3: Synthesizing perspective-based analysis...\n")
-    
-    # Create context from perspective data
-    context_parts = []
-    for perspective, articles in perspective_data.items():
-        if articles and isinstance(articles, list):
-            article_summaries = []
-            for art in articles[:5]:  # Top 5 per perspective
-                article_summaries.append(
-                    f"- {art['title']} ({art['domain']}, {art['sourcecountry']}) - {art['url']}"
-                )
-            context_parts.append(
-                f"### {perspective} PERSPECTIVE:\n" + "\n".join(article_summaries)
-            )
-    
-    context_str = "\n\n".join(context_parts)
-    
-    report_prompt = f"""You are 'TruthLens', an expert fact-checker specializing in multi-perspective analysis.
+def build_report_prompt(topic: str, input_bias_result: str, context_str: str) -> str:
+    """
+    Builds the TruthLens synthesis prompt from the topic, bias analysis and article context.
+    """
+    return f"""You are 'TruthLens', an expert fact-checker specializing in multi-perspective analysis.
 
 TOPIC: {topic}
 
@@ -282,36 +490,171 @@ OUTPUT FORMAT (Strict JSON-compatible Markdown):
 
 CRITICAL: Use ONLY sources provided. Include actual URLs. If a perspective has no articles, state "No coverage found from this perspective."
 """
+
+def fallback_search(topic: str, perspective_data: dict, allow_web_search: bool = True) -> dict:
+    """
+    Collapses duplicate and syndicated articles and falls back to DuckDuckGo when GDELT returned nothing.
+    Returns dict with the deduplicated perspectives, the unique articles and the web search
+    result (None if not needed, not allowed by the deadline, or failed).
+    """
+    perspectives, unique_articles = dedup_articles(perspective_data)
+    total = sum(len(articles) for articles in perspective_data.values())
+    print(f"\n  Total unique articles: {len(unique_articles)} ({total - len(unique_articles)} duplicates collapsed)")
     
+    web_search = None
+    if not unique_articles and not allow_web_search:
+        print("\n  ⚠ No GDELT results; no time left for the web search fallback")
+    elif not unique_articles:
+        print("\n  ⚠ No GDELT results. Trying DuckDuckGo fallback...")
+        try:
+            with metrics.span("web_search"):
+                web_search = registry.search().invoke(topic)
+        except Exception as e:
+            print(f"    ✗ Web search failed: {e}")
+
+    return {"perspectives": perspectives, "unique_articles": unique_articles, "web_search": web_search}
+
+def run_fact_check(topic: str, on_event=None, deadline: Deadline = None, on_stage=None):
+    """
+    Enhanced Fact Check Pipeline with political perspective analysis, run as a stage graph:
+    1-2. PLAN: Classify the input's political lean and create the GDELT queries for the
+       perspectives, in one structured LLM call
+    3. RETRIEVE: Execute queries concurrently and collect articles (in wide mode, one broad
+       query whose articles are assigned to perspectives by the source index; see use_wide_retrieval)
+    4. FALLBACK: Collapse duplicate/syndicated articles, and search the web if GDELT found nothing
+    5. REPORT: Synthesize with political perspective breakdown
+    If `on_event(event, data)` is given, it is called as each stage produces output
+    (input_bias, queries, articles, report_token) and the synthesis is streamed token by token.
+    `on_stage(name)` only reports which stage has started; it does not switch to streaming.
+    `deadline` caps the whole run (default: FACTCHECK_BUDGET_S from now). Upstream timeouts
+    are cut to the remaining budget, retrieval stops waiting SYNTHESIS_RESERVE_S before it,
+    and synthesis uses the perspectives that arrived in time (the rest are listed in
+    `skipped_perspectives`).
+    """
+    deadline = deadline or Deadline(FACTCHECK_BUDGET_S)
+    wide = use_wide_retrieval(len(PERSPECTIVE_LABELS), deadline.remaining(reserve=SYNTHESIS_RESERVE_S))
+    llm = registry.llm()
+    if llm is None:
+        return json.dumps({"error": "GROQ_API_KEY not found", "articles": []})
+
+    print(f"\n{'='*60}")
+    print(f"FACT-CHECKING: {topic}")
+    print(f"{'='*60}\n")
+
+    def emit(event, data):
+        if on_event:
+            on_event(event, data)
+
+    def plan():
+        # Wide retrieval sends only the general query, so only that one is requested
+        labels = tuple(PERSPECTIVE_LABELS[:1] if wide else PERSPECTIVE_LABELS)
+        timeout = deadline.timeout(LLM_TIMEOUT_S, reserve=SYNTHESIS_RESERVE_S, floor=1.0)
+        planned = plan_fact_check(topic, llm, timeout, labels)
+        emit("input_bias", {"input_bias": planned["input_bias"]})
+        queries = planned["queries"]
+        print(f"Generated {len(queries)} queries:")
+        for perspective, q in queries.items():
+            print(f"  {perspective}: {q[:80]}...")
+        emit("queries", {"queries": queries})
+        return planned
+
+    def retrieve(plan):
+        queries = plan["queries"]
+        on_result = lambda perspective, articles, latency_ms: emit("articles", {
+            "perspective": perspective,
+            "articles": articles,
+            "latency_ms": latency_ms
+        })
+        if wide:
+            print("\nRetrieving articles from GDELT (single wide query)...")
+            return retrieve_wide(queries["GENERAL"], on_result=on_result, deadline=deadline)
+        print("\nRetrieving articles from GDELT (concurrent)...")
+        return retrieve_perspectives(queries, on_result=on_result, deadline=deadline)
+
+    def fallback(retrieval):
+        return fallback_search(topic, retrieval["perspectives"], allow_web_search=not deadline.expired(SYNTHESIS_RESERVE_S))
+
+    def synthesize(plan, fallback):
+        perspective_data = dict(fallback["perspectives"])
+        if fallback["web_search"] is not None:
+            perspective_data["WEB_SEARCH"] = fallback["web_search"]
+        if not fallback["unique_articles"] and "WEB_SEARCH" not in perspective_data:
+            return None
+
+        context = build_context(topic, plan["input_bias"], perspective_data)
+        print(f"\nSynthesizing perspective-based analysis ({context['articles_used']} articles, ~{context['tokens']} context tokens)...\n")
+        report_prompt = build_report_prompt(context["topic"], context["input_bias"], context["context"])
+        # Synthesis always runs; it gets what is left of the budget, but at least the reserve
+        timeout = deadline.timeout(LLM_TIMEOUT_S, floor=SYNTHESIS_RESERVE_S)
+        if not on_event:
+            return invoke_llm(llm, report_prompt, "synthesis", timeout).content
+
+        tokens = []
+        for chunk in stream_llm(llm, report_prompt, "synthesis", timeout):
+            if chunk.content:
+                tokens.append(chunk.content)
+                emit("report_token", {"token": chunk.content})
+        return "".join(tokens)
+
+    graph = StageGraph(on_stage=on_stage)
+    graph.add("plan", plan)
+    graph.add("retrieval", retrieve, deps=["plan"])
+    graph.add("fallback", fallback, deps=["retrieval"])
+    graph.add("synthesis", synthesize, deps=["plan", "fallback"])
+
     try:
-        final_response = llm.invoke([HumanMessage(content=report_prompt)])
-        
-        result = {
-            "report": final_response.content,
-            "articles": unique_articles[:30],  # Return top 30 articles
-            "article_count": len(unique_articles),
-            "input_bias": input_bias_result,
-            "perspectives": {
-                "left": len(perspective_data.get("LEFT", [])),
-                "right": len(perspective_data.get("RIGHT", [])),
-                "center": len(perspective_data.get("CENTER", [])),
-                "international": len(perspective_data.get("INTERNATIONAL", []))
-            }
-        }
-        
-        print(f"{'='*60}")
-        print("FACT-CHECK COMPLETE")
-        print(f"{'='*60}\n")
-        
-        return json.dumps(result)
-        
+        results = graph.run()
     except Exception as e:
         return json.dumps({
             "error": f"Synthesis error: {e}",
-            "articles": unique_articles[:30],
+            "articles": graph.results.get("fallback", {}).get("unique_articles", [])[:30],
+            "perspectives": {}
+        })
+
+    input_bias_result = results["plan"]["input_bias"]
+    retrieval = results["retrieval"]
+    perspective_data = results["fallback"]["perspectives"]
+    unique_articles = results["fallback"]["unique_articles"]
+    report = results["synthesis"]
+
+    if report is None:
+        return json.dumps({
+            "error": "Rate limited by GDELT, try again shortly" if retrieval["throttled"] else "No data retrieved from any source",
+            "articles": [],
             "perspectives": {}
         })
 
+    result = {
+        "report": report,
+        "articles": unique_articles[:30],  # Return top 30 articles
+        "article_count": len(unique_articles),
+        "input_bias": input_bias_result,
+        "timings": {
+            "stages": graph.timings,
+            "query_latency_ms": retrieval["latency_ms"]
+        },
+        "skipped_perspectives": retrieval["skipped"],
+        "throttled_perspectives": retrieval["throttled"],
+        "retrieval": {"mode": "wide" if wide else "perspectives", "source_index": retrieval.get("source_index")},
+        "budget": {
+            "budget_s": deadline.budget,
+            "elapsed_s": round(deadline.elapsed(), 2),
+            "exceeded": deadline.expired()
+        },
+        "perspectives": {
+            "left": len(perspective_data.get("LEFT", [])),
+            "right": len(perspective_data.get("RIGHT", [])),
+            "center": len(perspective_data.get("CENTER", [])),
+            "international": len(perspective_data.get("INTERNATIONAL", []))
+        }
+    }
+    
+    print(f"{'='*60}")
+    print("FACT-CHECK COMPLETE")
+    print(f"{'='*60}\n")
+    
+    return json.dumps(result)
+
 if __name__ == "__main__":
     import sys
     
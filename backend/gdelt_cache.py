@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cache_store import SQLiteCache, CACHE_DIR
+from rate_limit import priority, BACKGROUND
+
+GDELT_CACHE_PATH = os.getenv("GDELT_CACHE_PATH", os.path.join(CACHE_DIR, "gdelt.sqlite3"))
+GDELT_CACHE_TTL = float(os.getenv("GDELT_CACHE_TTL", "900"))
+GDELT_CACHE_STALE = float(os.getenv("GDELT_CACHE_STALE", "3600"))
+GDELT_CACHE_MAX_MB = float(os.getenv("GDELT_CACHE_MAX_MB", "50"))
+GDELT_CACHE_ENABLED = os.getenv("GDELT_CACHE_ENABLED", "1") != "0"
+
+
+class GDELTCache:
+    """
+    On-disk cache in front of the GDELT DOC API with stale-while-revalidate.
+    Fresh entries (younger than `ttl`) are served directly. Entries up to `stale`
+    seconds past their TTL are served immediately while a background refresh
+    replaces them. Disk usage is bounded by `max_bytes` with LRU eviction.
+    """
+
+    def __init__(self, path: str = GDELT_CACHE_PATH, ttl: float = GDELT_CACHE_TTL,
+                 stale: float = GDELT_CACHE_STALE, max_bytes: int = int(GDELT_CACHE_MAX_MB * 1024 * 1024)):
+        self.store = SQLiteCache(path, ttl=ttl, max_entries=100000, max_bytes=max_bytes, max_age=ttl + stale)
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gdelt-refresh")
+
+    @staticmethod
+    def make_key(params: dict) -> str:
+        key_fields = [params.get("query"), params.get("mode"), params.get("maxrecords"), params.get("sortby")]
+        return hashlib.sha256(json.dumps(key_fields).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def cacheable(result: dict) -> bool:
+        # Only cache real article lists; errors and empty results should be retried upstream
+        return bool(result.get("articles")) and "error" not in result
+
+    def fetch(self, params: dict, loader, refresh_loader=None) -> dict:
+        """
+        Returns the GDELT result for `params`, calling `loader()` on a miss.
+        Background refreshes of stale entries call `refresh_loader()` (default: `loader`), so
+        they are not bound by the timeout of the request that happened to trigger them.
+        """
+        key = self.make_key(params)
+        entry = self.store.get_entry(key)
+
+        if entry is not None:
+            value, age = entry
+            if age <= self.store.ttl:
+                self.fresh_hits += 1
+                return value
+            if age <= self.store.max_age:
+                self.stale_hits += 1
+                self._schedule_refresh(key, refresh_loader or loader)
+                return value
+
+        self.misses += 1
+        result = loader()
+        if self.cacheable(result):
+            self.store.set(key, result)
+        return result
+
+    def _schedule_refresh(self, key: str, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                # Refreshes queue behind interactive requests for the GDELT rate limit
+                with priority(BACKGROUND):
+                    result = loader()
+                if self.cacheable(result):
+                    self.store.set(key, result)
+                self.refreshes += 1
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_pool.submit(refresh)
+
+    def stats(self) -> dict:
+        store_stats = self.store.stats()
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        return {
+            "entries": store_stats["entries"],
+            "bytes": store_stats["bytes"],
+            "evictions": store_stats["evictions"],
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hit_rate": round((self.fresh_hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,150 @@
+import math
+import time
+import uuid
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no room; `retry_after` is a hint in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    Bounded job queue processed by a fixed pool of worker threads.
+    Jobs are plain functions called as `func(progress, *args)`, where `progress(stage)`
+    records how far the job has got. Finished jobs are kept for `retention` seconds.
+    Jobs submitted with the same `key` while one is still queued or running are
+    coalesced onto that job instead of being computed twice. `on_done(job)` callbacks
+    run on the worker thread once the job has finished, for every coalesced submitter.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 32, retention: float = 3600):
+        self.workers = workers
+        self.retention = retention
+        self.jobs = {}
+        self.coalesced = 0
+        self._inflight = {}
+        self._callbacks = {}
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._avg_duration = None
+        self._threads = []
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, func, *args, key: str = None, on_done=None) -> str:
+        """
+        Enqueues a job and returns its ID, or the ID of the in-flight job with the same key.
+        Raises QueueFull when the queue is at capacity.
+        """
+        self.start()
+        self._purge()
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "key": key,
+            "status": "queued",
+            "stage": None,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None
+        }
+        with self._lock:
+            if key is not None and key in self._inflight:
+                self.coalesced += 1
+                existing_id = self._inflight[key]
+                if on_done:
+                    self._callbacks[existing_id].append(on_done)
+                return existing_id
+            self.jobs[job_id] = job
+            self._callbacks[job_id] = [on_done] if on_done else []
+            if key is not None:
+                self._inflight[key] = job_id
+        try:
+            self._queue.put_nowait((job, func, args))
+        except queue.Full:
+            with self._lock:
+                del self.jobs[job_id]
+                del self._callbacks[job_id]
+                self._inflight.pop(key, None)
+            raise QueueFull(self.retry_after())
+        return job_id
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def retry_after(self) -> int:
+        # Time for the workers to drain one round of the backlog
+        avg = self._avg_duration or 10.0
+        return max(1, math.ceil(avg * self._queue.qsize() / max(1, self.workers)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job["status"] for job in self.jobs.values()]
+        return {
+            "workers": self.workers,
+            "pending": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "running": statuses.count("running"),
+            "coalesced": self.coalesced,
+            "avg_duration_s": round(self._avg_duration, 2) if self._avg_duration else None
+        }
+
+    def _work(self):
+        while True:
+            job, func, args = self._queue.get()
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+            def progress(stage):
+                job["stage"] = stage
+
+            try:
+                job["result"] = func(progress, *args)
+                job["status"] = "done"
+            except Exception as e:
+                logger.error(f"Job {job['id']} failed: {e}")
+                job["error"] = str(e)
+                job["status"] = "failed"
+            finally:
+                job["finished_at"] = time.time()
+                with self._lock:
+                    if job["key"] is not None:
+                        self._inflight.pop(job["key"], None)
+                    callbacks = self._callbacks.pop(job["id"], [])
+                duration = job["finished_at"] - job["started_at"]
+                self._avg_duration = duration if self._avg_duration is None else 0.8 * self._avg_duration + 0.2 * duration
+                self._queue.task_done()
+
+            for callback in callbacks:
+                try:
+                    callback(dict(job))
+                except Exception as e:
+                    logger.error(f"Job {job['id']} callback failed: {e}")
+
+    def _purge(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job["finished_at"] and job["finished_at"] < cutoff]
+            for job_id in expired:
+                del self.jobs[job_id]
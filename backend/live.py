@@ -0,0 +1,142 @@
+import os
+import re
+import time
+import uuid
+import threading
+
+LIVE_SESSION_IDLE = float(os.getenv("LIVE_SESSION_IDLE", "600"))
+LIVE_MIN_CLAIM_WORDS = int(os.getenv("LIVE_MIN_CLAIM_WORDS", "6"))
+LIVE_MAX_EVENTS = int(os.getenv("LIVE_MAX_EVENTS", "500"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in _SENTENCE_END.split(text or "") if s.strip()]
+
+
+class LiveSession:
+    """
+    Rolling transcript for one live capture.
+    Each chunk's transcript is appended to the text carried over from the previous chunk;
+    every sentence except the last is complete, while the last one is held back until the
+    next chunk arrives (a chunk boundary may cut it mid-sentence) or the session is closed.
+    Events for the client are kept in an append-only log with increasing sequence numbers;
+    the stream is finished once the session is closed and no fact checks are outstanding.
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.transcript = []
+        self.pending = ""
+        self.chunks = 0
+        self.closed = False
+        self.outstanding = 0
+        self.last_active = time.time()
+        self.events = []
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def add_chunk(self, text: str) -> list:
+        """
+        Appends a chunk transcript and returns the sentences it completed.
+        """
+        with self._cond:
+            self.chunks += 1
+            self.last_active = time.time()
+            sentences = split_sentences(f"{self.pending} {text or ''}")
+            self.pending = sentences.pop() if sentences else ""
+            self.transcript.extend(sentences)
+            return sentences
+
+    def close(self) -> list:
+        """
+        Marks the session closed and returns the held-back final sentence, if any.
+        """
+        with self._cond:
+            sentences = split_sentences(self.pending)
+            self.pending = ""
+            self.transcript.extend(sentences)
+            self.closed = True
+            self.last_active = time.time()
+        return sentences
+
+    def track(self, delta: int):
+        """
+        Adjusts the number of fact checks still running for this session.
+        """
+        with self._cond:
+            self.outstanding += delta
+            self._cond.notify_all()
+
+    def finished(self) -> bool:
+        with self._cond:
+            return self.closed and self.outstanding == 0
+
+    def context(self, max_chars: int = 200) -> str:
+        # Tail of the transcript, used as the Whisper prompt for continuity across chunks
+        return self.full_transcript()[-max_chars:]
+
+    def full_transcript(self) -> str:
+        with self._cond:
+            return " ".join(self.transcript + ([self.pending] if self.pending else []))
+
+    def publish(self, event: str, data: dict):
+        with self._cond:
+            self._seq += 1
+            self.events.append((self._seq, event, data))
+            # Bound memory for long broadcasts; clients resuming from older IDs lose those events
+            if len(self.events) > LIVE_MAX_EVENTS:
+                del self.events[:len(self.events) - LIVE_MAX_EVENTS]
+            self._cond.notify_all()
+
+    def wait_events(self, after: int, timeout: float = 15) -> list:
+        """
+        Returns events with sequence number > `after`, waiting up to `timeout` seconds for one.
+        """
+        with self._cond:
+            idle = self.closed and self.outstanding == 0
+            if not idle and not (self.events and self.events[-1][0] > after):
+                self._cond.wait(timeout)
+            return [e for e in self.events if e[0] > after]
+
+
+class LiveSessionManager:
+    """
+    Registry of live sessions; sessions idle for longer than `idle_timeout` are dropped.
+    """
+
+    def __init__(self, idle_timeout: float = LIVE_SESSION_IDLE):
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> LiveSession:
+        self._purge()
+        session = LiveSession(uuid.uuid4().hex)
+        with self._lock:
+            self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str):
+        with self._lock:
+            return self.sessions.get(session_id)
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def _purge(self):
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            for session_id in [sid for sid, s in self.sessions.items() if s.last_active < cutoff]:
+                del self.sessions[session_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"active_sessions": len(self.sessions)}
+
+
+def is_checkable(sentence: str) -> bool:
+    # Skip fillers and fragments ("Thank you.", "Right, okay.")
+    return len(sentence.split()) >= LIVE_MIN_CLAIM_WORDS
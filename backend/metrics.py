@@ -0,0 +1,149 @@
+import os
+import time
+import bisect
+import threading
+from contextlib import nullcontext
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRIC_PREFIX = "truthlens_"
+# Seconds; spans cover everything from cache lookups to multi-second LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_NULL_SPAN = nullcontext()
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Span:
+    """
+    Times a block into the `<name>_seconds` histogram; exceptions also count in `<name>_errors_total`.
+    """
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name: str, labels: dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(f"{self.name}_seconds", time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            self.metrics.inc(f"{self.name}_errors_total", **self.labels)
+        return False
+
+
+class Metrics:
+    """
+    In-process counters, histograms and gauges rendered in the Prometheus text format.
+    When disabled every call returns immediately, so instrumentation can stay in hot paths.
+    Gauges are callbacks evaluated at scrape time (queue depths, spool size).
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, prefix: str = METRIC_PREFIX):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def span(self, name: str, **labels):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, labels)
+
+    def gauge(self, name: str, func):
+        """
+        Registers `func()` as a gauge; it returns a number or a {label_value: number} dict
+        for a gauge labelled by `key`.
+        """
+        if self.enabled:
+            self.gauges[name] = func
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(h.counts), h.sum, h.count, h.buckets)) for key, h in self.histograms.items())
+
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {self.prefix}{name} {kind}")
+
+        for (name, key), value in counters:
+            declare(name, "counter")
+            lines.append(f"{self.prefix}{name}{_format_labels(key)} {value}")
+
+        for (name, key), (counts, total, count, buckets) in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{self.prefix}{name}_bucket{_format_labels(key, (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{self.prefix}{name}_sum{_format_labels(key)} {round(total, 6)}")
+            lines.append(f"{self.prefix}{name}_count{_format_labels(key)} {count}")
+
+        for name, func in sorted(self.gauges.items()):
+            try:
+                value = func()
+            except Exception:
+                continue
+            declare(name, "gauge")
+            if isinstance(value, dict):
+                for label, v in sorted(value.items()):
+                    lines.append(f"{self.prefix}{name}{_format_labels((('key', str(label)),))} {v}")
+            else:
+                lines.append(f"{self.prefix}{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry used by the pipeline, the persistence layer and the server
+metrics = Metrics()
@@ -0,0 +1,232 @@
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+from contextlib import contextmanager
+from metrics import metrics
+
+# Request priorities; lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# GDELT's throttle notice asks for one request every 5 seconds
+GDELT_RATE = float(os.getenv("GDELT_RATE", "0.2"))          # requests per second
+GDELT_BURST = float(os.getenv("GDELT_BURST", "1"))
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))               # chat requests per minute
+GROQ_TPM = float(os.getenv("GROQ_TPM", "0"))                # tokens per minute, 0 = not limited
+WHISPER_RPM = float(os.getenv("WHISPER_RPM", "20"))
+RATE_LIMIT_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", "3"))
+RATE_LIMIT_MAX_BACKOFF = float(os.getenv("RATE_LIMIT_MAX_BACKOFF", "30"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_local = threading.local()
+
+
+class Throttled(Exception):
+    """Raised when an upstream rejects a request for rate reasons; `retry_after` is in seconds (or None)."""
+
+    def __init__(self, upstream: str, retry_after: float = None):
+        super().__init__(f"Rate limited by {upstream}")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+def current_priority() -> int:
+    return getattr(_local, "priority", INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    """
+    Sets the priority of upstream calls made by this thread inside the block.
+    """
+    previous = current_priority()
+    _local.priority = level
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def retry_after_from(response) -> float:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def as_throttled(upstream: str, exc: Exception):
+    """
+    Returns a Throttled for SDK errors carrying HTTP 429 (e.g. groq.RateLimitError) or a
+    transient 5xx, else None. The SDK clients are built without their own retries, so these
+    are retried by the limiter only.
+    """
+    if getattr(exc, "status_code", None) in RETRY_STATUSES:
+        return Throttled(upstream, retry_after_from(getattr(exc, "response", None)))
+    return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Client-side scheduler for one upstream.
+    Callers wait in a priority queue (interactive ahead of background, FIFO within a level);
+    only the head of the queue may take from the token buckets: one for requests and, if
+    `token_rate` is set, one for LLM tokens. A throttled response pauses the whole upstream
+    for its Retry-After (or an exponential backoff with jitter) before the call is retried,
+    so one 429 does not turn into a storm of them.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, token_rate: float = 0, token_burst: float = 0,
+                 max_retries: int = RATE_LIMIT_RETRIES, max_backoff: float = RATE_LIMIT_MAX_BACKOFF):
+        self.name = name
+        self.requests = TokenBucket(rate, burst) if rate > 0 else None
+        self.tokens = TokenBucket(token_rate, token_burst or token_rate * 60) if token_rate > 0 else None
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.throttled = 0
+        self.retries = 0
+        self.rejected = 0
+        self._paused_until = 0.0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def queue_depth(self) -> dict:
+        with self._cond:
+            depth = {label: 0 for label in PRIORITY_NAMES.values()}
+            for level, _ in self._waiting:
+                depth[PRIORITY_NAMES.get(level, str(level))] += 1
+            return depth
+
+    def _wait_time(self, cost: float) -> float:
+        now = time.monotonic()
+        wait = max(0.0, self._paused_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens and cost:
+            wait = max(wait, self.tokens.wait_time(cost, now))
+        return wait
+
+    def acquire(self, cost: float = 0, level: int = None, timeout: float = None) -> bool:
+        """
+        Waits for a slot. `cost` is the estimated LLM tokens of the call. Returns False if
+        `timeout` seconds pass first.
+        """
+        ticket = (current_priority() if level is None else level, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = self._wait_time(cost)
+                        if wait == 0.0:
+                            if self.requests:
+                                self.requests.take(1)
+                            if self.tokens and cost:
+                                self.tokens.take(cost)
+                            return True
+                    if timeout is not None:
+                        remaining = timeout - (time.monotonic() - start)
+                        if remaining <= 0:
+                            self.rejected += 1
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                metrics.observe("upstream_queue_wait_seconds", time.monotonic() - start, upstream=self.name)
+
+    def delay(self, requests: int = 1) -> float:
+        """
+        Estimated seconds until `requests` more calls could all have started, counting the
+        callers already queued ahead of them and any pause.
+        """
+        with self._cond:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if not self.requests:
+                return wait
+            self.requests._refill(now)
+            needed = len(self._waiting) + requests - self.requests.tokens
+            return wait + max(0.0, needed / self.requests.rate)
+
+    def pause(self, seconds: float):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def call(self, func, cost: float = 0, level: int = None, timeout: float = None):
+        """
+        Runs `func()` once a slot is free, retrying when it raises Throttled.
+        Raises Throttled when the retries are exhausted or no slot frees up in time;
+        `timeout` bounds the whole call, all attempts and pauses included.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        for attempt in range(self.max_retries + 1):
+            remaining = None if end is None else end - time.monotonic()
+            if (remaining is not None and remaining <= 0) or not self.acquire(cost, level, remaining):
+                raise Throttled(self.name)
+            try:
+                return func()
+            except Throttled as e:
+                self.throttled += 1
+                metrics.inc("upstream_throttled_total", upstream=self.name)
+                if attempt == self.max_retries:
+                    raise
+                backoff = e.retry_after or min(self.max_backoff, 2 ** attempt) * random.uniform(0.5, 1.5)
+                self.retries += 1
+                self.pause(min(backoff, self.max_backoff))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "paused_s": round(max(0.0, self._paused_until - time.monotonic()), 1)
+        }
+
+
+gdelt_limiter = RateLimiter("gdelt", GDELT_RATE, GDELT_BURST)
+groq_limiter = RateLimiter("groq", GROQ_RPM / 60, max(1.0, GROQ_RPM / 6), token_rate=GROQ_TPM / 60)
+whisper_limiter = RateLimiter("whisper", WHISPER_RPM / 60, max(1.0, WHISPER_RPM / 6))
+LIMITERS = (gdelt_limiter, groq_limiter, whisper_limiter)
+
+
+def stats() -> dict:
+    return {limiter.name: limiter.stats() for limiter in LIMITERS}
+
+
+metrics.gauge("upstream_queue_depth", lambda: {
+    f"{limiter.name}:{level}": depth
+    for limiter in LIMITERS
+    for level, depth in limiter.queue_depth().items()
+})
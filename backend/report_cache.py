@@ -0,0 +1,92 @@
+import os
+import re
+import hashlib
+import unicodedata
+from cache_store import SQLiteCache, CACHE_DIR
+from similarity import LSHIndex, claim_features, claim_terms, compatible_claims
+
+REPORT_CACHE_PATH = os.getenv("REPORT_CACHE_PATH", os.path.join(CACHE_DIR, "reports.sqlite3"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", str(6 * 3600)))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "2000"))
+# Tuned with test_claim_similarity.py: paraphrases score 0.67-1.0, same-topic different claims up to 0.6
+CLAIM_SIMILARITY_THRESHOLD = float(os.getenv("CLAIM_SIMILARITY_THRESHOLD", "0.65"))
+
+
+def normalize_claim(text: str) -> str:
+    """
+    Normalizes a claim so trivially different submissions share a cache key:
+    unicode-folded, lowercased, punctuation stripped and whitespace collapsed.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def claim_key(text: str) -> str:
+    return hashlib.sha256(normalize_claim(text).encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """
+    Claim-level cache of finished fact-check results.
+    Stores the run_fact_check result dict plus the Firestore report ID (if one was stored),
+    so a repeat claim can be answered without rerunning the pipeline. An in-memory LSH index
+    over cached claims also matches paraphrases whose similarity clears `similarity_threshold`.
+    """
+
+    def __init__(self, path: str = REPORT_CACHE_PATH, ttl: float = REPORT_CACHE_TTL,
+                 max_entries: int = REPORT_CACHE_MAX_ENTRIES,
+                 similarity_threshold: float = CLAIM_SIMILARITY_THRESHOLD):
+        self.store = SQLiteCache(path, ttl=ttl, max_entries=max_entries)
+        self.similarity_threshold = similarity_threshold
+        self.similar_hits = 0
+        self.index = LSHIndex()
+        # Rebuild the similarity index from claims that survived the restart
+        for key, entry in self.store.items():
+            self.index.add(key, claim_features(entry.get("claim", "")))
+
+    def lookup(self, text: str, similar: bool = True):
+        """
+        Returns {"result": ..., "reportId": ..., "match": "exact" | "similar"} for a fresh
+        cached claim, or None. With `similar`, falls back to the closest paraphrase.
+        """
+        key = claim_key(text)
+        entry = self.store.get(key)
+        if entry is not None:
+            return dict(entry, match="exact", similarity=1.0)
+        if not similar or self.similarity_threshold > 1:
+            return None
+
+        terms = claim_terms(normalize_claim(text))
+        for match_key, score in self.index.query(set(terms), self.similarity_threshold):
+            entry = self.store.get(match_key)
+            if entry is None:
+                # Expired or evicted since it was indexed
+                self.index.remove(match_key)
+                continue
+            if not compatible_claims(terms, claim_terms(entry.get("claim", ""))):
+                # Negated, about different numbers or with swapped roles: not the same claim
+                continue
+            self.similar_hits += 1
+            return dict(entry, match="similar", similarity=round(score, 3))
+        return None
+
+    def save(self, text: str, result: dict, report_id: str = None):
+        # Only complete reports are worth replaying; one missing perspectives (deadline or
+        # rate limit) should be checked again rather than served to repeats and paraphrases
+        if "report" not in result or result.get("skipped_perspectives") or result.get("throttled_perspectives"):
+            return
+        key = claim_key(text)
+        claim = normalize_claim(text)
+        self.store.set(key, {
+            "claim": claim,
+            "result": result,
+            "reportId": report_id
+        })
+        self.index.add(key, claim_features(claim))
+
+    def stats(self) -> dict:
+        stats = self.store.stats()
+        stats["similar_hits"] = self.similar_hits
+        stats["indexed_claims"] = len(self.index)
+        return stats
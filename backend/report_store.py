@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import string
+import secrets
+import sqlite3
+import logging
+import threading
+from cache_store import CACHE_DIR
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REPORT_SPOOL_PATH = os.getenv("REPORT_SPOOL_PATH", os.path.join(CACHE_DIR, "report_spool.sqlite3"))
+REPORT_WRITE_BATCH = int(os.getenv("REPORT_WRITE_BATCH", "20"))
+REPORT_FLUSH_INTERVAL = float(os.getenv("REPORT_FLUSH_INTERVAL", "0.5"))
+REPORT_MAX_BACKOFF = float(os.getenv("REPORT_MAX_BACKOFF", "60"))
+# Failed batch attempts before a batch's documents are written one at a time
+REPORT_MAX_ATTEMPTS = int(os.getenv("REPORT_MAX_ATTEMPTS", "3"))
+
+_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def new_report_id() -> str:
+    """
+    Generates a Firestore-style 20 character document ID locally.
+    """
+    return "".join(secrets.choice(_ID_ALPHABET) for _ in range(20))
+
+
+class FirestoreBackend:
+    """
+    Writes document batches to Firestore ('reports', 'articles', ...).
+    `get_db` returns the Firestore client, or None while it is unavailable.
+    """
+
+    def __init__(self, get_db):
+        self.get_db = get_db
+
+    def available(self) -> bool:
+        return self.get_db() is not None
+
+    def _db(self):
+        db = self.get_db()
+        if db is None:
+            raise RuntimeError("Firestore not connected")
+        return db
+
+    def write_batch(self, items: list):
+        from firebase_admin import firestore
+        db = self._db()
+        batch = db.batch()
+        for collection, doc_id, data in items:
+            batch.set(db.collection(collection).document(doc_id), dict(data, timestamp=firestore.SERVER_TIMESTAMP))
+        batch.commit()
+
+    def get(self, collection: str, doc_id: str):
+        snapshot = self._db().collection(collection).document(doc_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def get_many(self, collection: str, doc_ids: list) -> dict:
+        # One batched read for all IDs
+        db = self._db()
+        refs = [db.collection(collection).document(doc_id) for doc_id in doc_ids]
+        return {snapshot.id: snapshot.to_dict() for snapshot in db.get_all(refs) if snapshot.exists}
+
+
+class LocalBackend:
+    """
+    Local stand-in for Firestore: one JSON file per document in `directory/<collection>`.
+    """
+
+    def __init__(self, directory: str = os.path.join(CACHE_DIR, "reports_local")):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def available(self) -> bool:
+        return True
+
+    def _path(self, collection: str, doc_id: str) -> str:
+        return os.path.join(self.directory, collection, f"{doc_id}.json")
+
+    def write_batch(self, items: list):
+        for collection, doc_id, data in items:
+            path = self._path(collection, doc_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(dict(data, timestamp=time.time()), f)
+            os.replace(path + ".tmp", path)
+
+    def get(self, collection: str, doc_id: str):
+        path = self._path(collection, doc_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_many(self, collection: str, doc_ids: list) -> dict:
+        docs = {doc_id: self.get(collection, doc_id) for doc_id in doc_ids}
+        return {doc_id: data for doc_id, data in docs.items() if data is not None}
+
+
+class ReportWriter:
+    """
+    Write-behind persistence for reports and the articles they reference.
+    `enqueue` records the document in a durable local SQLite spool and returns at once; a
+    background worker flushes the spool to the backend in batches, retrying failed batches
+    with exponential backoff. Reports still spooled at shutdown are flushed on the next start.
+    A batch that fails `max_attempts` times is retried one document at a time, and documents
+    that still fail while others succeed (e.g. over the size limit) move to the `dead_letter`
+    table instead of blocking the spool.
+    `on_written(items)` is called with the (collection, doc_id, data) items of every
+    successful write, once the backend has confirmed it.
+    """
+
+    def __init__(self, backend, spool_path: str = REPORT_SPOOL_PATH, batch_size: int = REPORT_WRITE_BATCH,
+                 flush_interval: float = REPORT_FLUSH_INTERVAL, max_backoff: float = REPORT_MAX_BACKOFF,
+                 max_attempts: int = REPORT_MAX_ATTEMPTS, on_written=None):
+        self.backend = backend
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dead_letters = 0
+        self._backoff = 0.0
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        if os.path.dirname(spool_path):
+            os.makedirs(os.path.dirname(spool_path), exist_ok=True)
+        self._conn = sqlite3.connect(spool_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, enqueued_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            "seq INTEGER PRIMARY KEY, collection TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, "
+            "error TEXT, attempts INTEGER NOT NULL, failed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def available(self) -> bool:
+        return self.backend.available()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, doc_id: str, data: dict, collection: str = "reports"):
+        self.enqueue_many([(collection, doc_id, data)])
+
+    def enqueue_many(self, items: list):
+        """
+        Spools (collection, doc_id, data) items in one transaction; they are written in order.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO spool (collection, id, data, enqueued_at) VALUES (?, ?, ?, ?)",
+                [(collection, doc_id, json.dumps(data), now) for collection, doc_id, data in items]
+            )
+            self._conn.commit()
+        self.start()
+        self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def spooled(self, collection: str, doc_ids: list) -> dict:
+        """
+        Returns documents that are still waiting in the spool, so readers see their own writes.
+        """
+        if not doc_ids:
+            return {}
+        placeholders = ",".join("?" * len(doc_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM spool WHERE collection = ? AND id IN ({placeholders}) ORDER BY seq",
+                [collection, *doc_ids]
+            ).fetchall()
+        return {doc_id: json.loads(data) for doc_id, data in rows}
+
+    def flush(self) -> int:
+        """
+        Writes one batch from the spool. Returns the number of documents written.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, collection, id, data, attempts FROM spool ORDER BY seq LIMIT ?", (self.batch_size,)
+            ).fetchall()
+        if not rows:
+            return 0
+        if max(row[4] for row in rows) >= self.max_attempts:
+            return self._flush_singly(rows)
+
+        try:
+            with metrics.span("persistence_write"):
+                self.backend.write_batch([(collection, doc_id, json.loads(data)) for _, collection, doc_id, data, _ in rows])
+        except Exception as e:
+            self._failed(rows, e)
+            return 0
+
+        self._written(rows)
+        logger.info(f"Stored {len(rows)} document(s) in one batch")
+        return len(rows)
+
+    def _flush_singly(self, rows: list) -> int:
+        """
+        Writes the rows one at a time to isolate documents that keep failing. Documents that
+        fail while others in the pass succeed are moved to the dead-letter table; if nothing
+        could be written the backend is failing, not the documents, and the batch backs off.
+        """
+        written = []
+        failed = []
+        for row in rows:
+            try:
+                with metrics.span("persistence_write"):
+                    self.backend.write_batch([(row[1], row[2], json.loads(row[3]))])
+                written.append(row)
+            except Exception as e:
+                failed.append((row, e))
+
+        if not written:
+            self._failed(rows, failed[0][1])
+            return 0
+
+        self._written(written)
+        if failed:
+            now = time.time()
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dead_letter (seq, collection, id, data, error, attempts, failed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(row[0], row[1], row[2], row[3], str(e)[:500], row[4] + 1, now) for row, e in failed]
+                )
+                self._conn.executemany("DELETE FROM spool WHERE seq = ?", [(row[0],) for row, _ in failed])
+                self._conn.commit()
+            self.dead_letters += len(failed)
+            metrics.inc("persistence_dead_letters_total", len(failed))
+            for row, e in failed:
+                logger.error(f"Moved {row[1]}/{row[2]} to the dead-letter table: {e}")
+        logger.info(f"Stored {len(written)} document(s) one at a time")
+        return len(written)
+
+    def _written(self, rows: list):
+        self._backoff = 0.0
+        with self._lock:
+            self._conn.executemany("DELETE FROM spool WHERE seq = ?", [(row[0],) for row in rows])
+            self._conn.commit()
+        self.written += len(rows)
+        self.batches += 1
+        metrics.inc("persistence_documents_total", len(rows))
+        if self.on_written:
+            try:
+                self.on_written([(row[1], row[2], json.loads(row[3])) for row in rows])
+            except Exception as e:
+                logger.error(f"on_written callback failed: {e}")
+
+    def _failed(self, rows: list, error: Exception):
+        self.failures += 1
+        self._backoff = min(self.max_backoff, max(1.0, self._backoff * 2))
+        logger.error(f"Batch write failed ({len(rows)} documents, retry in {self._backoff:.0f}s): {error}")
+        with self._lock:
+            self._conn.executemany("UPDATE spool SET attempts = attempts + 1 WHERE seq = ?", [(row[0],) for row in rows])
+            self._conn.commit()
+
+    def dead_lettered(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+
+    def _run(self):
+        while True:
+            if self._backoff:
+                time.sleep(self._backoff)
+            elif not self.pending():
+                self._wake.wait()
+                self._wake.clear()
+            # Let a few more reports arrive so they share the batch
+            time.sleep(self.flush_interval)
+            while self.flush() == self.batch_size:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failures,
+            "dead_letters": self.dead_lettered()
+        }
@@ -1,15 +1,29 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify, Response, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
-from groq import Groq
-from fact_checker import run_fact_check  # Your enhanced fact_checker.py
+from fact_checker import run_fact_check, gdelt_cache, warm_up, FACTCHECK_BUDGET_S  # Your enhanced fact_checker.py
+from pipeline import Deadline
+from batch import run_batch_fact_check, parse_verdict
+from clients import registry
+from report_cache import ReportCache, claim_key
+from singleflight import SingleFlight
+from transcription import transcribe_audio, transcribe_single, language_name, hash_file, spooled_buffer, WHISPER_MODEL
+from transcript_cache import TranscriptCache
+from jobs import JobQueue, QueueFull
+from live import LiveSessionManager, is_checkable
+from report_store import ReportWriter, FirestoreBackend, LocalBackend, new_report_id
+from article_store import ArticleStore
+from metrics import metrics
+import rate_limit
 from dotenv import load_dotenv
 import os
-import tempfile
 import logging
 import json
-import firebase_admin
-from firebase_admin import credentials, firestore
+import math
+import queue
+import threading
 import datetime
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,44 +32,172 @@ logger = logging.getLogger(__name__)
 # Load env vars
 load_dotenv()
 
+MAX_UPLOAD_MB = float(os.environ.get("MAX_UPLOAD_MB", "25"))
+
+class SpooledRequest(Request):
+    """
+    Request that parses uploaded files into a bounded in-memory buffer instead of a
+    named temp file, spilling to an anonymous file only above AUDIO_SPOOL_MB.
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spooled_buffer()
+
 app = Flask(__name__)
+app.request_class = SpooledRequest
+app.config['MAX_CONTENT_LENGTH'] = int(MAX_UPLOAD_MB * 1024 * 1024)
 CORS(app)  # Enable CORS for Chrome extension
 
-# Initialize Groq client
-logger.info("Initializing Groq client...")
-client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-logger.info("Groq client initialized!")
-
-# Initialize Firebase Admin
-try:
-    cred_path = os.environ.get("FIREBASE_CREDENTIALS", "serviceAccountKey.json")
-    if os.path.exists(cred_path):
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-        db = firestore.client()
-        logger.info("Firebase Admin initialized successfully!")
-    else:
-        logger.warning(f"Firebase credentials not found at {cred_path}. Firestore features will be disabled.")
-        db = None
-except Exception as e:
-    logger.error(f"Failed to initialize Firebase: {e}")
-    db = None
+def get_groq_client():
+    # Shared, pooled Groq client from the process-wide registry
+    return registry.groq()
+
+# Firebase Admin and the LLM modules are initialized in the background so the server
+# is live immediately; /ready reports when they are done.
+db = None
+startup = {"started_at": time.time(), "firebase_ready": False, "warm": False, "ready_after_s": None}
+
+def init_firebase():
+    global db
+    try:
+        cred_path = os.environ.get("FIREBASE_CREDENTIALS", "serviceAccountKey.json")
+        if os.path.exists(cred_path):
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            cred = credentials.Certificate(cred_path)
+            firebase_admin.initialize_app(cred)
+            db = firestore.client()
+            logger.info("Firebase Admin initialized successfully!")
+        else:
+            logger.warning(f"Firebase credentials not found at {cred_path}. Firestore features will be disabled.")
+    except Exception as e:
+        logger.error(f"Failed to initialize Firebase: {e}")
+    finally:
+        startup["firebase_ready"] = True
+
+def background_startup():
+    init_firebase()
+    if report_writer.available():
+        # Flushes reports spooled by a previous run
+        report_writer.start()
+    if os.environ.get("WARMUP_ON_START", "1") != "0":
+        try:
+            warm_up()
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}")
+    startup["warm"] = True
+    startup["ready_after_s"] = round(time.time() - startup["started_at"], 3)
+    logger.info(f"Backend ready after {startup['ready_after_s']}s")
+
+def is_ready() -> bool:
+    return startup["firebase_ready"] and startup["warm"]
+
+# Write-behind report persistence (durable local spool, batched backend writes)
+if os.environ.get("PERSISTENCE_BACKEND", "firestore") == "local":
+    persistence_backend = LocalBackend()
+else:
+    persistence_backend = FirestoreBackend(lambda: db)
+report_writer = ReportWriter(persistence_backend)
+
+# Articles are stored once and referenced from reports
+article_store = ArticleStore(report_writer, persistence_backend)
+# Articles count as stored only once their write is confirmed, not when they are queued
+report_writer.on_written = article_store.mark_written
+
+threading.Thread(target=background_startup, name="startup", daemon=True).start()
+
+# Claim-level report cache (SQLite, survives restarts)
+report_cache = ReportCache()
+
+# Coalesces concurrent transcriptions of identical audio
+transcribe_flight = SingleFlight()
+
+# Content-addressed transcription cache
+transcript_cache = TranscriptCache()
+
+# Live capture sessions (incremental transcription + fact checks)
+live_sessions = LiveSessionManager()
+
+# Bounded worker pool for fact-check jobs
+job_queue = JobQueue(
+    workers=int(os.environ.get("FACTCHECK_WORKERS", "4")),
+    max_pending=int(os.environ.get("FACTCHECK_QUEUE_SIZE", "32")),
+    retention=float(os.environ.get("JOB_RETENTION", "3600"))
+)
+
+# Scrape-time gauges
+metrics.gauge("job_queue_pending", lambda: job_queue.stats()["pending"])
+metrics.gauge("job_queue_running", lambda: job_queue.stats()["running"])
+metrics.gauge("report_spool_pending", report_writer.pending)
+metrics.gauge("live_sessions_active", lambda: live_sessions.stats()["active_sessions"])
+metrics.gauge("cache_hit_rate", lambda: {
+    "report": report_cache.stats()["hit_rate"],
+    "transcript": transcript_cache.stats()["hit_rate"],
+    **({"gdelt": gdelt_cache.stats()["hit_rate"]} if gdelt_cache else {})
+})
+
+@app.before_request
+def start_request_timer():
+    request.environ["truthlens.start"] = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streaming responses are timed up to their headers
+    start = request.environ.get("truthlens.start")
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe("http_request_seconds", time.perf_counter() - start,
+                        endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of stage, upstream and HTTP metrics (METRICS_ENABLED=0 disables)"""
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics disabled"}), 404
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
+    """Health check endpoint (liveness: always 200 while the process serves requests)"""
     return jsonify({
         "status": "ok",
+        "live": True,
+        "ready": is_ready(),
         "model": "whisper-base",
         "firebase": "connected" if db else "disconnected",
+        "report_cache": report_cache.stats(),
+        "gdelt_cache": gdelt_cache.stats() if gdelt_cache else "disabled",
+        "jobs": job_queue.stats(),
+        "transcribe_coalescing": transcribe_flight.stats(),
+        "transcript_cache": transcript_cache.stats(),
+        "live_sessions": live_sessions.stats(),
+        "persistence": report_writer.stats(),
+        "articles": article_store.stats(),
+        "rate_limits": rate_limit.stats(),
+        "clients": registry.stats(),
         "message": "TruthLens service is running"
     })
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness endpoint: 503 until Firebase init and warm-up have finished"""
+    payload = {
+        "ready": is_ready(),
+        "firebase_ready": startup["firebase_ready"],
+        "warm": startup["warm"],
+        "ready_after_s": startup["ready_after_s"]
+    }
+    return jsonify(payload), 200 if payload["ready"] else 503
+
 @app.route('/transcribe', methods=['POST'])
 def transcribe():
     """
     Transcribe audio file sent from Chrome extension
+    Form fields: audio (file), mode ("auto" splits long recordings into parallel segments, "single" never does)
+    The upload is parsed straight into a bounded in-memory buffer (see SpooledRequest) and
+    streamed from there to the transcription call; no temp file is written for typical clips.
     """
+    audio_file = None
     try:
         if 'audio' not in request.files:
             return jsonify({
@@ -71,54 +213,51 @@ def transcribe():
                 "transcript": ""
             }), 400
 
-        # Save audio to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_audio:
-            audio_file.save(temp_audio.name)
-            temp_path = temp_audio.name
-
         logger.info(f"Processing audio file: {audio_file.filename}")
+        audio_hash, audio_size = hash_file(audio_file.stream)
+        if audio_size == 0:
+            return jsonify({
+                "error": "Empty audio file",
+                "transcript": ""
+            }), 400
         
-        # Call Groq Whisper API (Cloud)
-        with open(temp_path, "rb") as file:
-            transcription = client.audio.transcriptions.create(
-                file=(temp_path, file.read()),
-                model="whisper-large-v3",
-                response_format="verbose_json",
-            )
+        # Call Groq Whisper API (Cloud); long recordings are split and transcribed in parallel.
+        # Audio already transcribed is served from the content-addressed cache, and
+        # identical uploads in flight share one call.
+        mode = 'single' if request.form.get('mode') == 'single' else 'auto'
+        cache_key = transcript_cache.make_key(audio_hash, WHISPER_MODEL, "verbose_json", mode)
 
-        transcript = transcription.text
-        detected_language_code = getattr(transcription, 'language', 'en')
-        
-        # Language mapping for better UI feedback
-        lang_map = {
-            "hi": "Hindi",
-            "mr": "Marathi",
-            "ta": "Tamil",
-            "te": "Telugu",
-            "kn": "Kannada",
-            "gu": "Gujarati",
-            "pa": "Punjabi",
-            "bn": "Bengali",
-            "en": "English",
-            "ur": "Urdu"
-        }
-        
-        lang_name = lang_map.get(detected_language_code, detected_language_code.upper())
+        def compute_transcription():
+            if mode == 'single':
+                result = transcribe_single(get_groq_client(), audio_file.filename, audio_file.stream)
+            else:
+                result = transcribe_audio(get_groq_client(), audio_file.filename, audio_file.stream)
+            transcript_cache.set(cache_key, result)
+            return result
 
-        # Clean up
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
+        transcription = transcript_cache.get(cache_key)
+        cached = transcription is not None
+        if not cached:
+            transcription = transcribe_flight.do(cache_key, compute_transcription)
+
+        transcript = transcription["text"]
+        lang_name = language_name(transcription["language"])
 
-        logger.info(f"Transcription successful. Length: {len(transcript)} chars")
+        logger.info(f"Transcription successful. Length: {len(transcript)} chars ({audio_size} bytes of audio)")
 
         return jsonify({
             "transcript": transcript,
             "language": lang_name,
+            "cached": cached,
             "success": True
         })
 
+    except RequestEntityTooLarge:
+        return jsonify({
+            "error": f"Audio file exceeds the {MAX_UPLOAD_MB:g} MB upload limit",
+            "transcript": "",
+            "success": False
+        }), 413
     except Exception as e:
         logger.error(f"Transcription error: {str(e)}")
         return jsonify({
@@ -126,73 +265,183 @@ def transcribe():
             "transcript": "",
             "success": False
         }), 500
+    finally:
+        # Release the upload buffer (and its spill file, if any) even when the upstream call fails
+        if audio_file is not None:
+            audio_file.close()
+
+def cached_response(cached: dict) -> dict:
+    """
+    Builds the /factcheck response payload for a report cache hit.
+    """
+    payload = {
+        "success": True,
+        "message": "Report served from cache",
+        "cached": True,
+        "matched_claim": cached["claim"],
+        "similarity": cached["similarity"]
+    }
+    if report_writer.available() and cached.get("reportId"):
+        payload["reportId"] = cached["reportId"]
+    else:
+        result = cached["result"]
+        payload.update({
+            "result": result.get("report", ""),
+            "articles": result.get("articles", []),
+            "perspectives": result.get("perspectives", {})
+        })
+    return payload
+
+def store_report(text: str, result: dict) -> dict:
+    """
+    Queues a finished report for persistence (if a backend is available) and saves it
+    in the report cache. The report ID is assigned locally, so the response does not
+    wait for the Firestore round trip. Articles are stored separately; the report keeps
+    their IDs in rank order. Returns the /factcheck response payload.
+    """
+    report_data = {
+        "query": text,
+        "report": result.get("report", ""),
+        "article_count": result.get("article_count", 0),
+        "perspectives": result.get("perspectives", {}),
+        "input_bias": result.get("input_bias", ""),
+        "created_at": datetime.datetime.now().isoformat()
+    }
+    
+    if report_writer.available():
+        try:
+            report_id = new_report_id()
+            report_data["article_refs"], article_items = article_store.prepare(result.get("articles", []))
+            # Articles are spooled ahead of the report so they land in the same or an earlier batch
+            report_writer.enqueue_many(article_items + [("reports", report_id, report_data)])
+            report_cache.save(text, result, report_id)
+            
+            return {
+                "success": True,
+                "reportId": report_id,
+                "message": "Report generated; storage queued"
+            }
+        except Exception as db_e:
+            logger.error(f"Report spool error: {db_e}")
+            report_cache.save(text, result)
+            # Fallback to returning full data if the report cannot be queued
+            return {
+                "success": True,
+                "result": result.get("report", ""),
+                "articles": result.get("articles", []),
+                "perspectives": result.get("perspectives", {}),
+                "error_db": "Failed to store report"
+            }
+    else:
+        # Fallback if DB not configured
+        report_cache.save(text, result)
+        return {
+            "success": True,
+            "result": result.get("report", ""),
+            "articles": result.get("articles", []),
+            "perspectives": result.get("perspectives", {}),
+            "message": "DB not connected, returning raw data"
+        }
+
+def parse_factcheck_request():
+    """
+    Reads the claim and cache bypass flag from a JSON body or query string.
+    Returns (text, bypass_cache); text is None if missing.
+    """
+    data = request.get_json(silent=True) or {}
+    text = data.get('text') or request.args.get('text')
+    bypass_cache = bool(data.get('bypass_cache')) or request.args.get('nocache') == '1'
+    return text, bypass_cache
+
+def parse_deadline():
+    """
+    Starts the request's latency budget now, from `budget_ms` (JSON body or query string)
+    or the server default (FACTCHECK_BUDGET_S) when absent, so time spent queued counts.
+    `budget_ms: 0` runs without a deadline.
+    Raises ValueError when `budget_ms` is not a non-negative number.
+    """
+    data = request.get_json(silent=True) or {}
+    budget_ms = data.get('budget_ms')
+    if budget_ms is None:
+        budget_ms = request.args.get('budget_ms')
+    if budget_ms is None or budget_ms == "":
+        return Deadline(FACTCHECK_BUDGET_S)
+    try:
+        if isinstance(budget_ms, bool):
+            raise ValueError
+        budget_ms = float(budget_ms)
+    except (TypeError, ValueError):
+        raise ValueError("budget_ms must be a number of milliseconds")
+    if not math.isfinite(budget_ms) or budget_ms < 0:
+        raise ValueError("budget_ms must be 0 (no deadline) or a positive number of milliseconds")
+    return Deadline(budget_ms / 1000)
+
+def report_payload(text: str, result: dict) -> dict:
+    payload = store_report(text, result)
+    # Perspectives still rate limited after retries are missing from synthesis just like late ones
+    skipped = list(result.get("skipped_perspectives") or [])
+    skipped += [p for p in result.get("throttled_perspectives") or [] if p not in skipped]
+    if skipped:
+        payload["skipped_perspectives"] = skipped
+    return payload
+
+def process_factcheck(progress, text: str, deadline=None) -> dict:
+    """
+    Job body for /factcheck: runs the pipeline and stores the report.
+    Returns the same payload the synchronous endpoint used to return.
+    """
+    result = json.loads(run_fact_check(text, deadline=deadline, on_stage=progress))
+    if "error" in result and "report" not in result:
+        raise RuntimeError(result["error"])
+    progress("storing")
+    return report_payload(text, result)
 
 @app.route('/factcheck', methods=['POST'])
 def factcheck():
     """
     Enhanced fact-check endpoint with article listing and perspectives
-    Expects JSON: { "text": "claim to check" }
-    Returns: { "reportId": "...", "status": "stored" } or full details if db not available
+    Expects JSON: { "text": "claim to check", "bypass_cache": false, "budget_ms": 20000 }
+    Returns: 202 { "jobId": "...", "statusUrl": "/jobs/..." }; poll the status URL for the report.
+    budget_ms caps the time until the report is ready; perspectives that miss it, or that
+    GDELT kept rate limiting, are listed in skipped_perspectives.
+    Repeat claims (and close paraphrases) are answered immediately from the report cache
+    unless bypass_cache (or ?nocache=1) is set. A full queue returns 429 with Retry-After.
     """
     try:
-        data = request.get_json()
-        if not data or 'text' not in data:
+        text, bypass_cache = parse_factcheck_request()
+        if not text:
             return jsonify({"error": "No text provided"}), 400
+        try:
+            deadline = parse_deadline()
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
             
-        text = data['text']
         logger.info(f"Received fact check request for: {text}")
         
-        # Run enhanced fact check
-        result_json = run_fact_check(text)
-        result = json.loads(result_json)
+        cached = None if bypass_cache else report_cache.lookup(text)
+        if cached:
+            logger.info(f"Report cache hit ({cached['match']}, similarity {cached['similarity']})")
+            return jsonify(cached_response(cached))
         
-        if "error" in result and "report" not in result:
-            return jsonify({
-                "error": result["error"],
+        try:
+            # Identical claims already queued or running attach to the same job
+            job_id = job_queue.submit(process_factcheck, text, deadline, key=claim_key(text))
+        except QueueFull as e:
+            logger.warning("Fact check queue full, rejecting request")
+            response = jsonify({
+                "error": "Server busy, please retry later",
+                "retry_after": e.retry_after,
                 "success": False
-            }), 500
-            
-        # Store in Firestore if available
-        report_data = {
-            "query": text,
-            "report": result.get("report", ""),
-            "articles": result.get("articles", []),
-            "article_count": result.get("article_count", 0),
-            "perspectives": result.get("perspectives", {}),
-            "input_bias": result.get("input_bias", ""),
-            "timestamp": firestore.SERVER_TIMESTAMP,
-            "created_at": datetime.datetime.now().isoformat()
-        }
-        
-        if db:
-            try:
-                update_time, doc_ref = db.collection('reports').add(report_data)
-                logger.info(f"Report stored in Firestore with ID: {doc_ref.id}")
-                
-                return jsonify({
-                    "success": True,
-                    "reportId": doc_ref.id,
-                    "message": "Report generated and stored"
-                })
-            except Exception as db_e:
-                logger.error(f"Firestore error: {db_e}")
-                # Fallback to returning full data if DB fails
-                return jsonify({
-                    "success": True,
-                    "result": result.get("report", ""),
-                    "articles": result.get("articles", []),
-                    "perspectives": result.get("perspectives", {}),
-                    "error_db": "Failed to store report"
-                })
-        else:
-            # Fallback if DB not configured
-            return jsonify({
-                "success": True,
-                "result": result.get("report", ""),
-                "articles": result.get("articles", []),
-                "perspectives": result.get("perspectives", {}),
-                "message": "DB not connected, returning raw data"
             })
+            response.headers["Retry-After"] = str(e.retry_after)
+            return response, 429
+
+        return jsonify({
+            "success": True,
+            "jobId": job_id,
+            "status": "queued",
+            "statusUrl": f"/jobs/{job_id}"
+        }), 202
         
     except Exception as e:
         logger.error(f"Fact check error: {str(e)}")
@@ -201,15 +450,353 @@ def factcheck():
             "success": False
         }), 500
 
+def batch_lookup(claim: str):
+    cached = report_cache.lookup(claim)
+    if not cached:
+        return None
+    return dict(cached_response(cached), verdict=parse_verdict(cached["result"].get("report", "")))
+
+def process_batch(progress, text: str, bypass_cache: bool) -> dict:
+    """
+    Job body for /factcheck/batch: checks every claim in the text and stores one report per claim.
+    """
+    result = json.loads(run_batch_fact_check(
+        text,
+        lookup=None if bypass_cache else batch_lookup,
+        on_event=lambda event, data: progress(event)
+    ))
+    if "error" in result:
+        raise RuntimeError(result["error"])
+
+    progress("storing")
+    claims = []
+    for item in result["claims"]:
+        if item.get("cached"):
+            claims.append(item)
+        elif "report" in item:
+            claims.append(dict(store_report(item["claim"], item), claim=item["claim"], verdict=item["verdict"]))
+        else:
+            claims.append({"claim": item["claim"], "verdict": item["verdict"], "error": item.get("error"), "success": False})
+    return {
+        "success": True,
+        "claims": claims,
+        "claim_count": result["claim_count"],
+        "input_bias": result["input_bias"],
+        "upstream_calls": result["upstream_calls"]
+    }
+
+@app.route('/factcheck/batch', methods=['POST'])
+def factcheck_batch():
+    """
+    Batch fact-check for long, multi-claim text (transcripts)
+    Expects JSON: { "text": "transcript", "bypass_cache": false }
+    Returns: 202 { "jobId": "...", "statusUrl": "/jobs/..." }; once done the job carries
+    "claims": [{ "claim", "verdict", "reportId" | "result", "cached"? }, ...].
+    Claims are extracted in one LLM call and checked together, sharing query planning and
+    GDELT retrieval; claims already in the report cache are not checked again.
+    """
+    try:
+        text, bypass_cache = parse_factcheck_request()
+        if not text:
+            return jsonify({"error": "No text provided"}), 400
+
+        logger.info(f"Received batch fact check request ({len(text)} chars)")
+        try:
+            job_id = job_queue.submit(process_batch, text, bypass_cache, key=f"batch:{claim_key(text)}")
+        except QueueFull as e:
+            logger.warning("Fact check queue full, rejecting batch request")
+            response = jsonify({
+                "error": "Server busy, please retry later",
+                "retry_after": e.retry_after,
+                "success": False
+            })
+            response.headers["Retry-After"] = str(e.retry_after)
+            return response, 429
+
+        return jsonify({
+            "success": True,
+            "jobId": job_id,
+            "status": "queued",
+            "statusUrl": f"/jobs/{job_id}"
+        }), 202
+
+    except Exception as e:
+        logger.error(f"Batch fact check error: {str(e)}")
+        return jsonify({
+            "error": str(e),
+            "success": False
+        }), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Fact-check job status
+    Returns: { "jobId", "status": queued|running|done|failed, "stage" } plus the
+    /factcheck report payload once done, or the error once failed.
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job", "success": False}), 404
+
+    payload = {
+        "jobId": job["id"],
+        "status": job["status"],
+        "stage": job["stage"]
+    }
+    if job["status"] == "done":
+        payload.update(job["result"])
+    elif job["status"] == "failed":
+        payload.update({"error": job["error"], "success": False})
+    return jsonify(payload)
+
+def sse_event(event: str, data: dict, event_id: int = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/reports/<report_id>', methods=['GET'])
+def get_report(report_id):
+    """
+    Returns a stored report with its article references hydrated (one batched article read).
+    Reports still waiting in the write spool are served from the spool.
+    """
+    report = report_writer.spooled("reports", [report_id]).get(report_id)
+    if report is None and persistence_backend.available():
+        try:
+            report = persistence_backend.get("reports", report_id)
+        except Exception as e:
+            logger.error(f"Report read failed: {e}")
+            return jsonify({"error": "Failed to load report"}), 500
+    if report is None:
+        return jsonify({"error": "Report not found"}), 404
+
+    report.pop("timestamp", None)
+    if "article_refs" in report:
+        report["articles"] = article_store.resolve(report["article_refs"])
+    return jsonify(report)
+
+def process_stream(progress, text: str, deadline, events: queue.Queue):
+    """
+    Job body for /factcheck/stream: runs the pipeline with every event (including the
+    synthesis tokens) put on `events`, then the final complete/error event and None.
+    """
+    try:
+        result = json.loads(run_fact_check(
+            text, on_event=lambda event, data: events.put((event, data)), deadline=deadline, on_stage=progress
+        ))
+        if "error" in result and "report" not in result:
+            events.put(("error", {"error": result["error"], "success": False}))
+        else:
+            events.put(("complete", report_payload(text, result)))
+    except Exception as e:
+        logger.error(f"Streaming fact check error: {str(e)}")
+        events.put(("error", {"error": str(e), "success": False}))
+    finally:
+        events.put(None)
+
+@app.route('/factcheck/stream', methods=['GET', 'POST'])
+def factcheck_stream():
+    """
+    Streaming fact-check endpoint (Server-Sent Events)
+    Accepts the same input as /factcheck (JSON body, or ?text= for EventSource clients).
+    Emits: input_bias, queries, articles (one per perspective), report_token (synthesis
+    streamed token by token), then complete (same payload as /factcheck) or error.
+    """
+    text, bypass_cache = parse_factcheck_request()
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+    try:
+        deadline = parse_deadline()
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+
+    logger.info(f"Received streaming fact check request for: {text}")
+
+    def respond(generate):
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        })
+
+    cached = None if bypass_cache else report_cache.lookup(text)
+    if cached:
+        return respond(lambda: iter([sse_event("complete", cached_response(cached))]))
+
+    events = queue.Queue()
+    try:
+        # Runs on the bounded job pool like /factcheck; each stream needs its own events,
+        # so streams are not coalesced with other jobs for the same claim
+        job_queue.submit(process_stream, text, deadline, events)
+    except QueueFull as e:
+        logger.warning("Fact check queue full, rejecting streaming request")
+        response = jsonify({
+            "error": "Server busy, please retry later",
+            "retry_after": e.retry_after,
+            "success": False
+        })
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 429
+
+    def generate():
+        while True:
+            item = events.get()
+            if item is None:
+                break
+            yield sse_event(*item)
+
+    return respond(generate)
+
+def check_live_sentences(session, sentences: list):
+    """
+    Publishes newly completed sentences and queues a fact check for each checkable one.
+    Results are pushed to the session's event log as the jobs finish.
+    """
+    for sentence in sentences:
+        session.publish("sentence", {"text": sentence})
+        if not is_checkable(sentence):
+            continue
+
+        cached = report_cache.lookup(sentence)
+        if cached:
+            session.publish("result", dict(cached_response(cached), claim=sentence))
+            continue
+
+        def on_done(job, sentence=sentence):
+            if job["status"] == "done":
+                session.publish("result", dict(job["result"], claim=sentence, jobId=job["id"]))
+            else:
+                session.publish("error", {"claim": sentence, "jobId": job["id"], "error": job["error"], "success": False})
+            session.track(-1)
+
+        session.track(1)
+        try:
+            # The budget starts when the sentence arrives, as for /factcheck
+            job_id = job_queue.submit(
+                process_factcheck, sentence, Deadline(FACTCHECK_BUDGET_S), key=claim_key(sentence), on_done=on_done
+            )
+            session.publish("claim", {"claim": sentence, "jobId": job_id})
+        except QueueFull as e:
+            session.track(-1)
+            session.publish("skipped", {"claim": sentence, "reason": "queue full", "retry_after": e.retry_after})
+
+@app.route('/live', methods=['POST'])
+def live_start():
+    """
+    Start a live transcription + fact-check session
+    Returns: { "sessionId", "chunkUrl", "eventsUrl" }
+    """
+    session = live_sessions.create()
+    return jsonify({
+        "success": True,
+        "sessionId": session.id,
+        "chunkUrl": f"/live/{session.id}/chunk",
+        "eventsUrl": f"/live/{session.id}/events"
+    })
+
+@app.route('/live/<session_id>/chunk', methods=['POST'])
+def live_chunk(session_id):
+    """
+    Transcribe the next audio chunk of a live session
+    Form fields: audio (file; each chunk must be a self-contained recording, e.g. one
+    MediaRecorder start/stop cycle), final ("1" closes the session after this chunk)
+    Newly completed sentences are fact-checked in the background; results arrive on /events.
+    """
+    session = live_sessions.get(session_id)
+    if not session:
+        return jsonify({"error": "Unknown session", "success": False}), 404
+    if session.closed:
+        return jsonify({"error": "Session closed", "success": False}), 409
+
+    audio_file = None
+    try:
+        audio_file = request.files.get('audio')
+        text = ""
+        if audio_file and audio_file.filename:
+            transcription = transcribe_single(get_groq_client(), audio_file.filename, audio_file.stream, prompt=session.context())
+            text = transcription["text"].strip()
+            session.publish("transcript", {
+                "chunk": session.chunks + 1,
+                "text": text,
+                "language": language_name(transcription["language"])
+            })
+
+        sentences = session.add_chunk(text)
+        if request.form.get('final') == '1':
+            sentences += session.close()
+        check_live_sentences(session, sentences)
+
+        return jsonify({
+            "success": True,
+            "text": text,
+            "completedSentences": sentences,
+            "closed": session.closed
+        })
+    except RequestEntityTooLarge:
+        return jsonify({"error": f"Audio chunk exceeds the {MAX_UPLOAD_MB:g} MB upload limit", "success": False}), 413
+    except Exception as e:
+        logger.error(f"Live chunk error: {str(e)}")
+        session.publish("error", {"error": str(e), "success": False})
+        return jsonify({"error": str(e), "success": False}), 500
+    finally:
+        if audio_file is not None:
+            audio_file.close()
+
+@app.route('/live/<session_id>', methods=['DELETE'])
+def live_stop(session_id):
+    """
+    Close a live session; the held-back last sentence is checked too.
+    Returns: { "transcript": "..." }
+    """
+    session = live_sessions.get(session_id)
+    if not session:
+        return jsonify({"error": "Unknown session", "success": False}), 404
+    if not session.closed:
+        check_live_sentences(session, session.close())
+    return jsonify({"success": True, "transcript": session.full_transcript()})
+
+@app.route('/live/<session_id>/events', methods=['GET'])
+def live_events(session_id):
+    """
+    Server-Sent Events for a live session
+    Emits: transcript (per chunk), sentence (each completed sentence), claim (fact check
+    queued), result (same payload as a finished /factcheck job, plus "claim"), skipped, error,
+    and finally done. Supports resuming with the Last-Event-ID header.
+    """
+    session = live_sessions.get(session_id)
+    if not session:
+        return jsonify({"error": "Unknown session", "success": False}), 404
+
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('after') or 0
+    try:
+        last_id = int(last_id)
+    except ValueError:
+        last_id = 0
+
+    def generate():
+        after = last_id
+        while True:
+            events = session.wait_events(after)
+            for seq, event, data in events:
+                after = seq
+                yield sse_event(event, data, seq)
+            if session.finished() and not session.wait_events(after, timeout=0):
+                yield sse_event("done", {"transcript": session.full_transcript()})
+                return
+            if not events:
+                yield ": keepalive\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("TruthLens Enhanced Server")
     print("="*60)
     print("Server running on http://localhost:5001")
-    if db:
-        print("  - Firestore: Connected")
-    else:
-        print("  - Firestore: Not Connected (Check serviceAccountKey.json)")
+    print("  - Firestore: Initializing in background (check /ready)")
     print("="*60 + "\n")
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # The reloader would run the startup thread, Firebase init, warm-up and spool flush
+    # in a second process, so debug mode (opt-in with FLASK_DEBUG=1) runs without it
+    app.run(host='0.0.0.0', port=5001, debug=os.getenv("FLASK_DEBUG") == "1", use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,185 @@
+import re
+import zlib
+import random
+import threading
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "for", "with", "by", "from",
+    "as", "is", "are", "was", "were", "be", "been", "being", "has", "have", "had", "will", "would",
+    "it", "its", "this", "that", "these", "those", "he", "she", "they", "we", "you", "i", "his", "her",
+    "their", "our", "says", "said", "after", "over", "into", "about", "than", "more"
+}
+# Negated claims keep a "not" feature, and only match claims negated the same way
+NEGATIONS = {"not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "without", "cannot"}
+NEGATION_FEATURE = "not"
+# Stems that claims use interchangeably, folded to one feature
+SYNONYMS = {
+    "soldi": "troop", "milit": "troop", "army": "troop", "armie": "troop",
+    "sends": "send", "sent": "send", "deplo": "send", "dispa": "send",
+    "incre": "rise", "raise": "rise", "rises": "rise", "rose": "rise", "hike": "rise", "hikes": "rise", "hiked": "rise",
+    "reduc": "cut", "cuts": "cut", "lower": "cut",
+    "bans": "ban", "banne": "ban", "prohi": "ban",
+    "kill": "kille", "kills": "kille",
+}
+_CONTRACTION = re.compile(r"n['’ ]t\b")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def tokenize(text: str) -> list:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def claim_terms(text: str, prefix: int = 5) -> list:
+    """
+    Content-word terms of a short claim, in order. Truncating tokens to a fixed prefix is a
+    cheap stemmer that folds inflections ("deployed"/"deploys", "germany"/"german");
+    common synonyms share a term, numbers are kept whole and any negation (including
+    "n't") becomes a "not" term.
+    """
+    terms = []
+    for tok in tokenize(_CONTRACTION.sub(" not", (text or "").lower())):
+        if tok in NEGATIONS:
+            terms.append(NEGATION_FEATURE)
+        elif any(ch.isdigit() for ch in tok):
+            terms.append(tok)
+        elif tok not in STOPWORDS:
+            terms.append(SYNONYMS.get(tok[:prefix], tok[:prefix]))
+    return terms
+
+
+def claim_features(text: str, prefix: int = 5) -> set:
+    """
+    Unordered claim_terms, for MinHash/LSH.
+    """
+    return set(claim_terms(text, prefix))
+
+
+def swapped_roles(a: list, b: list) -> bool:
+    """
+    Whether two shared terms trade places across another shared term, as the subject and
+    object around a verb do ("Russia invaded Ukraine" / "Ukraine invaded Russia").
+    Neighbours swapping ("gasoline taxes" / "taxes on gasoline") is allowed.
+    """
+    common = set(a) & set(b)
+    order_a = [t for i, t in enumerate(a) if t in common and t not in a[:i]]
+    order_b = [t for i, t in enumerate(b) if t in common and t not in b[:i]]
+    pos_b = {t: i for i, t in enumerate(order_b)}
+    for i, x in enumerate(order_a):
+        for j in range(i + 1, len(order_a)):
+            y = order_a[j]
+            if pos_b[x] > pos_b[y] and (j - i > 1 or pos_b[x] - pos_b[y] > 1):
+                return True
+    return False
+
+
+def compatible_claims(a: list, b: list) -> bool:
+    """
+    Claims with the same words can still contradict each other: require the same polarity,
+    the same numbers and the same roles (see swapped_roles) before treating two claim_terms
+    lists as paraphrases. Passive rewordings fail the role check too; they are checked again.
+    """
+    if (NEGATION_FEATURE in a) != (NEGATION_FEATURE in b):
+        return False
+    if {t for t in a if t[0].isdigit()} != {t for t in b if t[0].isdigit()}:
+        return False
+    return not swapped_roles(a, b)
+
+
+def shingles(text: str, k: int = 3) -> set:
+    """
+    Word k-gram shingles, used for near-duplicate detection of longer strings such as headlines.
+    """
+    tokens = tokenize(text)
+    if len(tokens) < k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """
+    MinHash signatures over feature sets, using universal hashing of a CRC32 base hash.
+    """
+
+    def __init__(self, num_perm: int = 32, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, features: set) -> tuple:
+        hashes = [zlib.crc32(f.encode("utf-8")) for f in features]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self.params
+        )
+
+
+class LSHIndex:
+    """
+    Locality-sensitive hashing index over MinHash signatures.
+    Signatures are split into `bands` of `num_perm / bands` rows; any shared band makes two
+    entries candidates, and candidates are confirmed with exact Jaccard similarity.
+    """
+
+    def __init__(self, num_perm: int = 32, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature: tuple) -> list:
+        return [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+
+    def add(self, key, features: set):
+        signature = self.hasher.signature(features)
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (features, signature)
+            for band, band_key in zip(self.buckets, self._band_keys(signature)):
+                band.setdefault(band_key, set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for band, band_key in zip(self.buckets, self._band_keys(entry[1])):
+            members = band.get(band_key)
+            if members:
+                members.discard(key)
+                if not members:
+                    del band[band_key]
+
+    def query(self, features: set, threshold: float) -> list:
+        """
+        Returns [(key, similarity), ...] for entries with Jaccard >= threshold, best first.
+        """
+        signature = self.hasher.signature(features)
+        with self._lock:
+            candidates = set()
+            for band, band_key in zip(self.buckets, self._band_keys(signature)):
+                candidates.update(band.get(band_key, ()))
+            matches = [(key, jaccard(features, self.entries[key][0])) for key in candidates]
+        matches = [m for m in matches if m[1] >= threshold]
+        matches.sort(key=lambda m: m[1], reverse=True)
+        return matches
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,84 @@
+import os
+import json
+import threading
+
+SOURCE_INDEX_PATH = os.getenv(
+    "SOURCE_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "source_index.json")
+)
+# Bucket order of the assigned perspectives; GENERAL holds home-country outlets without a known lean
+PERSPECTIVES = ("GENERAL", "LEFT", "RIGHT", "CENTER", "INTERNATIONAL")
+UNKNOWN_COUNTRY = "Unknown"
+
+
+def normalize_domain(domain: str) -> str:
+    domain = (domain or "").strip().lower().rstrip(".")
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+class SourceIndex:
+    """
+    Versioned domain -> perspective lookup used to bucket the results of a single wide GDELT query.
+    Domains are held in one dict; a lookup tries the domain and then its parent domains
+    (edition.cnn.com -> cnn.com), so it costs at most a few dict probes per article.
+    Outlets with no entry are INTERNATIONAL when their source country is outside
+    `home_countries` and GENERAL otherwise, so every article lands in exactly one bucket.
+    """
+
+    def __init__(self, path: str = SOURCE_INDEX_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.version = data["version"]
+        self.home_countries = set(data.get("home_countries", []))
+        self.domains = {}
+        for perspective, domains in data["domains"].items():
+            if perspective not in PERSPECTIVES:
+                raise ValueError(f"Unknown perspective in source index: {perspective}")
+            for domain in domains:
+                domain = normalize_domain(domain)
+                if self.domains.setdefault(domain, perspective) != perspective:
+                    raise ValueError(f"Domain listed under two perspectives in source index: {domain}")
+
+    def lean(self, domain: str):
+        labels = normalize_domain(domain).split(".")
+        for i in range(len(labels) - 1):
+            perspective = self.domains.get(".".join(labels[i:]))
+            if perspective:
+                return perspective
+        return None
+
+    def classify(self, article: dict) -> str:
+        perspective = self.lean(article.get("domain"))
+        if perspective:
+            return perspective
+        country = article.get("sourcecountry")
+        if country and country != UNKNOWN_COUNTRY and country not in self.home_countries:
+            return "INTERNATIONAL"
+        return "GENERAL"
+
+    def assign(self, articles: list) -> dict:
+        """
+        Splits articles into {perspective: [articles]} for all PERSPECTIVES, keeping their order.
+        """
+        buckets = {perspective: [] for perspective in PERSPECTIVES}
+        for art in articles:
+            buckets[self.classify(art)].append(art)
+        return buckets
+
+    def stats(self) -> dict:
+        return {"version": self.version, "domains": len(self.domains)}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_source_index() -> SourceIndex:
+    """
+    Returns the process-wide index, loading it on first use.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SourceIndex()
+    return _index
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from report_cache import ReportCache
+
+# (cached claim, new claim): should reuse the cached report
+PARAPHRASES = [
+    ("Germany sends troops to Greenland", "German soldiers deployed to Greenland"),
+    ("The vaccine causes autism", "Vaccines cause autism"),
+    ("Joe Biden won the 2020 election", "Biden won the 2020 presidential election"),
+    ("The government raised taxes on gasoline", "The government increased gasoline taxes"),
+]
+
+# (cached claim, new claim): must be checked again
+DIFFERENT = [
+    ("Trump is guilty of fraud", "Trump is not guilty of fraud"),
+    ("The vaccine causes autism", "The vaccine does not cause autism"),
+    ("The vaccine causes autism", "The vaccine doesn't cause autism"),
+    ("Germany sends troops to Greenland", "Germany sends aid to Greenland"),
+    ("Unemployment fell to 5 percent", "Unemployment fell to 7 percent"),
+    ("Biden won the 2020 election", "Biden won the 2024 election"),
+    ("Russia invaded Ukraine", "Ukraine invaded Russia"),
+    ("Trump beat Biden in 2020", "Biden beat Trump in 2020"),
+    ("Police killed the protester", "The protester killed police"),
+    ("The senator killed", "The senator died"),
+]
+
+
+def check(pairs, expect_match):
+    failures = 0
+    for cached, claim in pairs:
+        cache = ReportCache(path=os.path.join(tempfile.mkdtemp(), "reports.sqlite3"))
+        cache.save(cached, {"report": f"report for {cached}"})
+        hit = cache.lookup(claim)
+        ok = (hit is not None) == expect_match
+        failures += not ok
+        score = hit["similarity"] if hit else "-"
+        print(f"  {'ok  ' if ok else 'FAIL'} {claim!r} vs {cached!r}: {score}")
+    return failures
+
+
+if __name__ == "__main__":
+    print("Paraphrases (should match):")
+    failures = check(PARAPHRASES, True)
+    print("Different claims (should not match):")
+    failures += check(DIFFERENT, False)
+    print(f"\n{failures} failure(s)")
+    raise SystemExit(1 if failures else 0)
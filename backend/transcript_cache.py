@@ -0,0 +1,34 @@
+import os
+import hashlib
+from cache_store import SQLiteCache, CACHE_DIR
+
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", os.path.join(CACHE_DIR, "transcripts.sqlite3"))
+TRANSCRIPT_CACHE_TTL = float(os.getenv("TRANSCRIPT_CACHE_TTL", str(7 * 24 * 3600)))
+TRANSCRIPT_CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "20"))
+
+
+class TranscriptCache:
+    """
+    Content-addressed cache of Whisper results, keyed on the SHA-256 of the audio bytes
+    plus everything that changes the output (model, response format, segmentation mode).
+    """
+
+    def __init__(self, path: str = TRANSCRIPT_CACHE_PATH, ttl: float = TRANSCRIPT_CACHE_TTL,
+                 max_bytes: int = int(TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)):
+        self.store = SQLiteCache(path, ttl=ttl, max_entries=100000, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(audio_hash: str, model: str, response_format: str, mode: str) -> str:
+        return hashlib.sha256(f"{audio_hash}:{model}:{response_format}:{mode}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns {"text": ..., "language": <code>, ...} for a cached transcription, or None.
+        """
+        return self.store.get(key)
+
+    def set(self, key: str, transcription: dict):
+        self.store.set(key, transcription)
+
+    def stats(self) -> dict:
+        return self.store.stats()
@@ -0,0 +1,230 @@
+import os
+import io
+import re
+import wave
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from metrics import metrics
+from rate_limit import as_throttled, whisper_limiter
+
+WHISPER_MODEL = "whisper-large-v3"
+SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "60"))
+OVERLAP_SECONDS = float(os.getenv("TRANSCRIBE_OVERLAP_SECONDS", "2"))
+SEGMENT_WORKERS = int(os.getenv("TRANSCRIBE_MAX_WORKERS", "4"))
+AUDIO_SPOOL_BYTES = int(float(os.getenv("AUDIO_SPOOL_MB", "8")) * 1024 * 1024)
+# Lowest audio bitrate assumed for uploads: anything smaller than one segment at this rate
+# is short enough for a single request, so it is not decoded to measure its length
+MIN_AUDIO_KBPS = float(os.getenv("TRANSCRIBE_MIN_KBPS", "16"))
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit mono PCM
+CHUNK_SIZE = 64 * 1024
+
+# Language mapping for better UI feedback
+LANGUAGE_NAMES = {
+    "hi": "Hindi",
+    "mr": "Marathi",
+    "ta": "Tamil",
+    "te": "Telugu",
+    "kn": "Kannada",
+    "gu": "Gujarati",
+    "pa": "Punjabi",
+    "bn": "Bengali",
+    "en": "English",
+    "ur": "Urdu"
+}
+
+
+def language_name(code: str) -> str:
+    return LANGUAGE_NAMES.get(code, (code or "en").upper())
+
+
+def ffmpeg_available() -> bool:
+    return bool(shutil.which("ffmpeg"))
+
+
+def spooled_buffer():
+    """
+    Upload buffer that stays in memory up to AUDIO_SPOOL_BYTES and spills to disk above it.
+    The spill file is anonymous and disappears when the buffer is closed.
+    """
+    return tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_BYTES)
+
+
+def hash_file(audio_file) -> tuple:
+    """
+    Returns (sha256 hex digest, size in bytes) of a seekable file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    audio_file.seek(0)
+    for chunk in iter(lambda: audio_file.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    audio_file.seek(0)
+    return digest.hexdigest(), size
+
+
+def decode_pcm(audio_file) -> bytes:
+    """
+    Decodes any container ffmpeg understands into 16 kHz mono 16-bit PCM, streaming the
+    input through a pipe. MediaRecorder WebM carries no duration in its header, so decoding
+    is also how the real length of a capture is measured.
+    """
+    audio_file.seek(0)
+    proc = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+
+    def feed():
+        try:
+            shutil.copyfileobj(audio_file, proc.stdin, CHUNK_SIZE)
+        except (BrokenPipeError, ValueError):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    pcm = proc.stdout.read()
+    proc.wait()
+    feeder.join()
+    audio_file.seek(0)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode audio (exit {proc.returncode})")
+    return pcm
+
+
+def pcm_to_wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def split_pcm(pcm: bytes, segment_seconds: float = SEGMENT_SECONDS,
+              overlap_seconds: float = OVERLAP_SECONDS) -> list:
+    """
+    Cuts decoded PCM into WAV segments of `segment_seconds` that overlap by `overlap_seconds`.
+    Returns the WAV payloads in order.
+    """
+    bytes_per_second = SAMPLE_RATE * SAMPLE_WIDTH
+    segment_len = int(segment_seconds * bytes_per_second)
+    step = max(bytes_per_second, int((segment_seconds - overlap_seconds) * bytes_per_second))
+    step -= step % SAMPLE_WIDTH
+
+    segments = []
+    start = 0
+    while start < len(pcm):
+        segments.append(pcm_to_wav(pcm[start:start + segment_len]))
+        if start + segment_len >= len(pcm):
+            break
+        start += step
+    return segments
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def stitch_transcripts(texts: list, max_overlap_words: int = 30) -> str:
+    """
+    Joins consecutive segment transcripts, dropping the words at the start of each segment
+    that repeat the end of the previous one (the audio overlap).
+    """
+    words = []
+    for text in texts:
+        segment_words = (text or "").split()
+        if not words:
+            words.extend(segment_words)
+            continue
+
+        tail = [_normalize_word(w) for w in words[-max_overlap_words:]]
+        head = [_normalize_word(w) for w in segment_words[:max_overlap_words]]
+        overlap = 0
+        for k in range(min(len(tail), len(head)), 0, -1):
+            if tail[-k:] == head[:k]:
+                overlap = k
+                break
+        words.extend(segment_words[overlap:])
+    return " ".join(words)
+
+
+def transcribe_single(client, filename: str, audio, model: str = WHISPER_MODEL, prompt: str = None) -> dict:
+    """
+    Single Whisper request. `audio` is bytes or a binary file object, sent as-is.
+    `prompt` optionally carries preceding transcript for continuity.
+    Requests wait for the Whisper rate limiter and are retried there on HTTP 429.
+    Returns {"text": ..., "language": <code>}.
+    """
+    extra = {"prompt": prompt} if prompt else {}
+
+    def request():
+        if hasattr(audio, "seek"):
+            audio.seek(0)
+        try:
+            with metrics.span("whisper_request"):
+                return client.audio.transcriptions.create(
+                    file=(filename, audio),
+                    model=model,
+                    response_format="verbose_json",
+                    **extra
+                )
+        except Exception as e:
+            throttled = as_throttled("whisper", e)
+            if throttled:
+                raise throttled from e
+            raise
+
+    transcription = whisper_limiter.call(request)
+    return {"text": transcription.text, "language": getattr(transcription, 'language', 'en')}
+
+
+def transcribe_audio(client, filename: str, audio_file, model: str = WHISPER_MODEL,
+                     segment_seconds: float = SEGMENT_SECONDS, overlap_seconds: float = OVERLAP_SECONDS) -> dict:
+    """
+    Transcribes a recording from a seekable file object, splitting long audio into
+    overlapping segments that are transcribed concurrently and stitched back together.
+    Short audio, or hosts without ffmpeg, use a single request with the original upload.
+    Only uploads too large to be shorter than one segment at MIN_AUDIO_KBPS are decoded.
+    Returns {"text": ..., "language": <code>, "segments": <count>}.
+    """
+    audio_file.seek(0, os.SEEK_END)
+    size = audio_file.tell()
+    audio_file.seek(0)
+    might_be_long = size > (segment_seconds + overlap_seconds) * MIN_AUDIO_KBPS * 1000 / 8
+    pcm = decode_pcm(audio_file) if might_be_long and ffmpeg_available() else None
+    if pcm is None or len(pcm) <= (segment_seconds + overlap_seconds) * SAMPLE_RATE * SAMPLE_WIDTH:
+        result = transcribe_single(client, filename, audio_file, model)
+        result["segments"] = 1
+        return result
+
+    segments = split_pcm(pcm, segment_seconds, overlap_seconds)
+    del pcm
+
+    def transcribe_segment(indexed):
+        idx, wav = indexed
+        return transcribe_single(client, f"segment_{idx:04d}.wav", wav, model)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SEGMENT_WORKERS, len(segments)))) as pool:
+        results = list(pool.map(transcribe_segment, enumerate(segments)))
+
+    # Most segments agree on the language; short silent ones can misdetect
+    languages = Counter(r["language"] for r in results if r.get("language"))
+    return {
+        "text": stitch_transcripts([r["text"] for r in results]),
+        "language": languages.most_common(1)[0][0] if languages else "en",
+        "segments": len(results)
+    }
@@ -351,8 +351,16 @@ document.addEventListener('DOMContentLoaded', () => {
                         body: JSON.stringify({ text: text })
                     });
 
+                    if (response.status === 429) {
+                        const busy = await response.json();
+                        throw new Error(`Server busy, please retry in ${busy.retry_after || 5}s`);
+                    }
                     if (!response.ok) throw new Error('Fact check failed');
-                    const data = await response.json();
+                    let data = await response.json();
+
+                    if (data.jobId) {
+                        data = await waitForJob(data.jobId, factCheckBtn);
+                    }
 
                     if (data.success && data.reportId) {
                         const reportUrl = `http://localhost:5173/report/${data.reportId}`;
@@ -379,6 +387,21 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    async function waitForJob(jobId, statusBtn) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const response = await fetch(`http://localhost:5001/jobs/${jobId}`);
+            if (!response.ok) throw new Error('Fact check job lost');
+            const job = await response.json();
+
+            if (job.status === 'done') return job;
+            if (job.status === 'failed') throw new Error(job.error || 'Fact check failed');
+            if (statusBtn && job.stage) {
+                statusBtn.innerHTML = `⏳ Checking (${job.stage})... <span class="loading"></span>`;
+            }
+        }
+    }
+
     function displayFactCheckResult(markdownResult, articles = [], perspectives = {}, articleCount = 0) {
         // Parse sections
         const coreFactMatch = markdownResult.match(/\*\*Core Fact\*\*:\s*(.*?)(?=\*\*Input Bias|\*\*Perspectives\*\*|$)/s);
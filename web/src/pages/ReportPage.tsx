@@ -1,9 +1,47 @@
 import { useEffect, useState } from 'react';
 import { useParams } from 'react-router-dom';
-import { doc, getDoc } from 'firebase/firestore';
+import { collection, doc, documentId, getDoc, getDocs, query, where } from 'firebase/firestore';
 import { db } from '../firebase';
 import FactCheckReport from '../components/FactCheckReport';
 
+// Reports are written to Firestore in the background after the ID is handed out,
+// so a freshly opened report may need a moment to appear.
+const RETRY_DELAYS_MS = [300, 600, 1000, 1500, 2000];
+
+// The backend also serves reports still waiting in its write spool, which can take much
+// longer to reach Firestore while writes are failing and backing off
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || 'http://localhost:5001';
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Firestore 'in' queries accept at most 30 values
+const ARTICLE_BATCH_SIZE = 30;
+
+// Reports store article IDs (in rank order); the articles live in their own collection
+async function resolveArticles(refs: string[]) {
+  const batches = [];
+  for (let i = 0; i < refs.length; i += ARTICLE_BATCH_SIZE) {
+    const ids = refs.slice(i, i + ARTICLE_BATCH_SIZE);
+    batches.push(getDocs(query(collection(db, 'articles'), where(documentId(), 'in', ids))));
+  }
+  const byId = new Map<string, any>();
+  for (const snapshot of await Promise.all(batches)) {
+    snapshot.forEach((articleDoc) => byId.set(articleDoc.id, articleDoc.data()));
+  }
+  return refs.filter((ref) => byId.has(ref)).map((ref) => byId.get(ref));
+}
+
+// Returns the report with its articles from the backend, or null if it has none (or is not running)
+async function fetchFromBackend(id: string) {
+  try {
+    const response = await fetch(`${BACKEND_URL}/reports/${encodeURIComponent(id)}`);
+    return response.ok ? await response.json() : null;
+  } catch (err) {
+    console.warn('Backend report lookup failed', err);
+    return null;
+  }
+}
+
 export default function ReportPage() {
   const { id } = useParams<{ id: string }>();
   const [data, setData] = useState<any>(null);
@@ -22,11 +60,25 @@ export default function ReportPage() {
         }
 
         const docRef = doc(db, 'reports', id);
-        const docSnap = await getDoc(docRef);
+        let docSnap = await getDoc(docRef);
+        for (const delay of RETRY_DELAYS_MS) {
+          if (docSnap.exists()) break;
+          await sleep(delay);
+          docSnap = await getDoc(docRef);
+        }
         if (docSnap.exists()) {
-          setData(docSnap.data());
+          const report = docSnap.data();
+          if (report.article_refs && !report.articles) {
+            report.articles = await resolveArticles(report.article_refs);
+          }
+          setData(report);
         } else {
-          setError('Report not found');
+          const spooled = await fetchFromBackend(id);
+          if (spooled) {
+            setData(spooled);
+          } else {
+            setError('Report not found');
+          }
         }
       } catch (err: any) {
         console.error(err);